@@ -1,511 +1,489 @@
-import streamlit as st
-import pandas as pd
-from io import BytesIO
-import re
-
-# 页面基本设置
-st.set_page_config(page_title="安贸数据整合系统", layout="wide")
-st.title("📁 安贸审核资料自动整合系统")
-st.subheader("YAMAHA 供应商数据自动化处理平台(MC sheet/ Relocation sheet/ STK MACHINE SHIPPPING info sheet)", divider="rainbow")
-
-# 初始化session state
-session_defaults = {
-    'mc_data': None,
-    'rel_data': None,
-    'stock_data': None,
-    'processed_files': set(),
-    'mc_success_count': 0,
-    'rel_success_count': 0,
-    'stock_success_count': 0
-}
-for key, value in session_defaults.items():
-    if key not in st.session_state:
-        st.session_state[key] = value
-
-# ================== 统一文件处理函数 ==================
-def process_mc_file(file):
-    """处理MC Info文件"""
-    try:
-        engine = 'xlrd' if file.name.endswith('.xls') else 'openpyxl'
-        df = pd.read_excel(file, header=None, engine=engine)
-        
-        mc_data = []
-        cd_code = df.iloc[10, 3] if df.shape[0] > 10 else ''
-        
-        for row in range(20, min(len(df), 100)):
-            if all(pd.isna(df.iloc[row, i]) for i in range(4)):
-                continue
-                
-            mc_data.append({
-                "CD Code": cd_code,
-                "Machine Type": df.iloc[row, 2] if df.shape[1] > 2 else '',
-                "S/N#": df.iloc[row, 3] if df.shape[1] > 3 else '',
-                "File_name": file.name
-            })
-            
-        return pd.DataFrame(mc_data)
-    except Exception as e:
-        st.error(f"❌ MC文件处理失败：{file.name} - {str(e)}")
-        return None
-
-def process_rel_file(file):
-    """处理Relocation文件（四阶段抓取）"""
-    try:
-        engine = 'xlrd' if file.name.endswith('.xls') else 'openpyxl'
-        df = pd.read_excel(file, header=None, engine=engine)
-        
-        rel_data = []
-        from_cd = df.iloc[24, 3] if df.shape[0] > 24 else ''
-        to_cd = df.iloc[26, 3] if df.shape[0] > 26 else ''
-        
-        # 模式1：原始抓取方式
-        for row in range(32, min(len(df), 100)):
-            if row >= len(df):
-                break
-            if df.shape[1] > 7 and pd.isna(df.iloc[row, 6]) and pd.isna(df.iloc[row, 7]):
-                break
-            rel_data.append({
-                "From_CD Code": from_cd,
-                "To_CD Code": to_cd,
-                "Machine Type": df.iloc[row, 1] if df.shape[1] > 1 else '',
-                "S/N#": df.iloc[row, 4] if df.shape[1] > 4 else '',
-                "File_name": file.name
-            })
-        
-        # 模式2：备用抓取方案
-        if len(rel_data) == 0:
-            for row in range(33, min(len(df), 100)):
-                if row >= len(df):
-                    break
-                if df.shape[1] > 8 and pd.isna(df.iloc[row, 7]) and pd.isna(df.iloc[row, 8]):
-                    break
-                machine_type = df.iloc[row, 1] if df.shape[1] > 1 else ''
-                sn = df.iloc[row, 4] if df.shape[1] > 4 else ''
-                if pd.notna(machine_type) or pd.notna(sn):
-                    rel_data.append({
-                        "From_CD Code": from_cd,
-                        "To_CD Code": to_cd,
-                        "Machine Type": machine_type,
-                        "S/N#": sn,
-                        "File_name": file.name
-                    })
-        
-        # 模式3：终极抓取方案
-        if len(rel_data) == 0:
-            # B列抓取（B33开始）
-            b_data = []
-            for row in range(33, min(len(df), 200)):
-                if row >= len(df):
-                    break
-                if df.shape[1] > 8 and pd.isna(df.iloc[row, 7]) and pd.isna(df.iloc[row, 8]):
-                    break
-                b_value = df.iloc[row, 1] if df.shape[1] > 1 else None
-                if pd.notna(b_value):
-                    b_data.append({
-                        "From_CD Code": from_cd,
-                        "To_CD Code": to_cd,
-                        "Machine Type": b_value,
-                        "S/N#": "",
-                        "File_name": file.name
-                    })
-            
-            # E列抓取（E33开始）
-            e_data = []
-            for row in range(33, min(len(df), 200)):
-                if row >= len(df):
-                    break
-                if df.shape[1] > 8 and pd.isna(df.iloc[row, 7]) and pd.isna(df.iloc[row, 8]):
-                    break
-                e_value = df.iloc[row, 4] if df.shape[1] > 4 else None
-                if pd.notna(e_value):
-                    e_data.append({
-                        "From_CD Code": from_cd,
-                        "To_CD Code": to_cd,
-                        "Machine Type": "",
-                        "S/N#": e_value,
-                        "File_name": file.name
-                    })
-            
-            rel_data.extend(b_data)
-            rel_data.extend(e_data)
-        
-        # 模式4：旧版处理逻辑（从第32行开始逐行扫描）
-        if len(rel_data) == 0:
-            row = 32
-            while row < len(df):
-                if row >= len(df):
-                    break
-                # 检查H列(7)和I列(8)是否同时为空
-                if df.shape[1] > 8 and pd.isna(df.iloc[row, 7]) and pd.isna(df.iloc[row, 8]):
-                    break
-                
-                # 提取数据
-                machine_type = df.iloc[row, 1] if df.shape[1] > 1 else ''
-                sn = df.iloc[row, 4] if df.shape[1] > 4 else ''
-                
-                if pd.notna(machine_type) or pd.notna(sn):
-                    rel_data.append({
-                        "From_CD Code": from_cd,
-                        "To_CD Code": to_cd,
-                        "Machine Type": machine_type,
-                        "S/N#": sn,
-                        "File_name": file.name
-                    })
-                row += 1
-        
-        return pd.DataFrame(rel_data)
-    except Exception as e:
-        st.error(f"❌ Relocation文件处理失败：{file.name} - {str(e)}")
-        return None
-
-def process_stock_file(file):
-    """处理Stock Machine文件"""
-    try:
-        engine = 'xlrd' if file.name.endswith('.xls') else 'openpyxl'
-        df = pd.read_excel(file, header=None, engine=engine)
-        
-        if '二合一' in file.name:
-            return process_combined_stock(df, file)
-        return process_normal_stock(df, file)
-    except Exception as e:
-        st.error(f"❌ Stock文件处理失败：{file.name} - {str(e)}")
-        return None
-
-def process_normal_stock(df, file):
-    """处理普通Stock文件"""
-    stock_data = []
-    c15 = str(df.iloc[14, 2]) if df.shape[0] > 14 and df.shape[1] > 2 else ''
-    matches = re.findall(r'[（(]([^）)]+)[）)]', c15)
-    cd_code = matches[-1].strip() if matches else ''
-    
-    for row in range(20, min(len(df), 100)):
-        if df.shape[1] < 10:
-            break
-            
-        if pd.isna(df.iloc[row, 8]) and pd.isna(df.iloc[row, 9]):
-            break
-            
-        b_col = df.iloc[row, 1] if df.shape[1] > 1 else None
-        e_col = df.iloc[row, 4] if df.shape[1] > 4 else None
-        
-        if pd.notna(b_col) or pd.notna(e_col):
-            stock_data.append({
-                "CD Code": cd_code,
-                "Machine Type": b_col,
-                "S/N#": e_col,
-                "File_name": file.name
-            })
-            
-    return pd.DataFrame(stock_data)
-
-def process_combined_stock(df, file):
-    """处理二合一Stock文件"""
-    combined_data = []
-    cd_end_user = df.iloc[14, 3] if df.shape[0] > 14 and df.shape[1] > 3 else ''
-    cd_distributor = df.iloc[15, 3] if df.shape[0] > 15 and df.shape[1] > 3 else ''
-    
-    for row in range(21, min(len(df), 100)):
-        if df.shape[1] < 6:
-            break
-            
-        if pd.isna(df.iloc[row, 9]):
-            break
-            
-        c_col = df.iloc[row, 2] if df.shape[1] > 2 else None
-        f_col = df.iloc[row, 5] if df.shape[1] > 5 else None
-        
-        if pd.notna(c_col) or pd.notna(f_col):
-            combined_data.append({
-                "CD Code_End User": cd_end_user,
-                "CD Code_Distributor": cd_distributor,
-                "Machine Type": c_col,
-                "S/N#": f_col,
-                "File_name": file.name
-            })
-            
-    return pd.DataFrame(combined_data)
-
-# ================== 统一文件处理区 ==================
-with st.container(border=True):
-    st.subheader("📁 统一数据上传处理区", divider="rainbow")
-    
-    uploaded_files = st.file_uploader(
-        "请上传所有相关文件（可多选）",
-        type=['xls', 'xlsx', 'xlsm'],
-        accept_multiple_files=True,
-        key="unified_uploader"
-    )
-
-    if uploaded_files:
-        file_processors = {
-            'MC': {
-                'pattern': re.compile(r'MC Info', re.IGNORECASE),
-                'data_key': 'mc_data',
-                'count_key': 'mc_success_count'
-            },
-            'REL': {
-                'pattern': re.compile(r'relocation', re.IGNORECASE),
-                'data_key': 'rel_data',
-                'count_key': 'rel_success_count'
-            },
-            'STOCK': {
-                'pattern': re.compile(r'(Stock Machine|二合一)', re.IGNORECASE),
-                'data_key': 'stock_data',
-                'count_key': 'stock_success_count'
-            }
-        }
-
-        for file in uploaded_files:
-            if file.name in st.session_state.processed_files:
-                st.warning(f"⏩ 已跳过重复文件：{file.name}")
-                continue
-
-            file_type = None
-            for ft, config in file_processors.items():
-                if config['pattern'].search(file.name):
-                    file_type = ft
-                    break
-
-            if not file_type:
-                st.error(f"❌ 无法识别的文件类型：{file.name}")
-                continue
-
-            try:
-                processor = globals()[f'process_{file_type.lower()}_file']
-                processed_data = processor(file)
-                
-                if processed_data is not None and not processed_data.empty:
-                    current_data = st.session_state[file_processors[file_type]['data_key']]
-                    if current_data is not None:
-                        st.session_state[file_processors[file_type]['data_key']] = pd.concat(
-                            [current_data, processed_data], ignore_index=True)
-                    else:
-                        st.session_state[file_processors[file_type]['data_key']] = processed_data
-                    
-                    st.session_state.processed_files.add(file.name)
-                    st.session_state[file_processors[file_type]['count_key']] += 1
-                else:
-                    st.warning(f"⚠️ 文件未包含有效数据：{file.name}")
-            except Exception as e:
-                st.error(f"❌ 处理文件时发生严重错误：{file.name} - {str(e)}")
-
-        # 显示成功统计
-        success_col1, success_col2, success_col3 = st.columns(3)
-        with success_col1:
-            st.info(f"✅ 成功处理MC文件数量：{st.session_state.mc_success_count}")
-        with success_col2:
-            st.info(f"✅ 成功处理Relocation文件数量：{st.session_state.rel_success_count}")
-        with success_col3:
-            st.info(f"✅ 成功处理Stock文件数量：{st.session_state.stock_success_count}")
-
-        # 三栏并排显示
-        col1, col2, col3 = st.columns(3)
-        
-        # MC数据展示
-        with col1:
-            if st.session_state.mc_data is not None and not st.session_state.mc_data.empty:
-                st.subheader("MC Info 数据", divider="blue")
-                st.dataframe(st.session_state.mc_data, use_container_width=True)
-                
-                buffer = BytesIO()
-                with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                    st.session_state.mc_data.to_excel(writer, index=False)
-                    worksheet = writer.sheets["Sheet1"]
-                    worksheet.freeze_panes(1, 0)
-                    for col_num, col_name in enumerate(st.session_state.mc_data.columns):
-                        max_len = max(st.session_state.mc_data[col_name].astype(str).str.len().max(), len(col_name)) + 2
-                        worksheet.set_column(col_num, col_num, max_len)
-                
-                st.download_button(
-                    "💾 下载MC数据",
-                    data=buffer.getvalue(),
-                    file_name="MC_Data.xlsx",
-                    mime="application/vnd.ms-excel",
-                    use_container_width=True
-                )
-
-        # Relocation数据展示
-        with col2:
-            if st.session_state.rel_data is not None and not st.session_state.rel_data.empty:
-                st.subheader("Relocation 数据", divider="orange")
-                st.dataframe(st.session_state.rel_data, use_container_width=True)
-                
-                buffer = BytesIO()
-                with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                    st.session_state.rel_data.to_excel(writer, index=False)
-                    worksheet = writer.sheets["Sheet1"]
-                    worksheet.freeze_panes(1, 0)
-                    for col_num, col_name in enumerate(st.session_state.rel_data.columns):
-                        max_len = max(st.session_state.rel_data[col_name].astype(str).str.len().max(), len(col_name)) + 2
-                        worksheet.set_column(col_num, col_num, max_len)
-                
-                st.download_button(
-                    "💾 下载Relocation数据",
-                    data=buffer.getvalue(),
-                    file_name="Relocation_Data.xlsx",
-                    mime="application/vnd.ms-excel",
-                    use_container_width=True
-                )
-
-        # Stock数据展示
-        with col3:
-            if st.session_state.stock_data is not None and not st.session_state.stock_data.empty:
-                st.subheader("Stock 数据", divider="violet")
-                st.dataframe(st.session_state.stock_data, use_container_width=True)
-                
-                buffer = BytesIO()
-                with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                    st.session_state.stock_data.to_excel(writer, index=False)
-                    worksheet = writer.sheets["Sheet1"]
-                    worksheet.freeze_panes(1, 0)
-                    for col_num, col_name in enumerate(st.session_state.stock_data.columns):
-                        max_len = max(st.session_state.stock_data[col_name].astype(str).str.len().max(), len(col_name)) + 2
-                        worksheet.set_column(col_num, col_num, max_len)
-                
-                st.download_button(
-                    "💾 下载Stock数据",
-                    data=buffer.getvalue(),
-                    file_name="Stock_Data.xlsx",
-                    mime="application/vnd.ms-excel",
-                    use_container_width=True
-                )
-
-# ================== 整合下载区 ==================
-if any(st.session_state[key] is not None for key in ['mc_data', 'rel_data', 'stock_data']):
-    st.divider()
-    with st.container(border=True):
-        st.subheader("🚀 数据整合下载区", divider="green")
-
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-            sheets = {
-                "MC Info": st.session_state.mc_data,
-                "Relocation": st.session_state.rel_data,
-                "STOCK MACHINE SHIPPING INFO": st.session_state.stock_data[
-                    st.session_state.stock_data['File_name'].str.contains('二合一') == False] 
-                    if st.session_state.stock_data is not None else pd.DataFrame(),
-                "二合一STOCK MACHINE SHIPPING INFO": st.session_state.stock_data[
-                    st.session_state.stock_data['File_name'].str.contains('二合一')] 
-                    if st.session_state.stock_data is not None else pd.DataFrame()
-            }
-
-            for sheet_name, df in sheets.items():
-                if df is not None and not df.empty:
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
-                    worksheet = writer.sheets[sheet_name]
-                    worksheet.freeze_panes(1, 0)
-                    for col_num, col_name in enumerate(df.columns):
-                        max_len = max(df[col_name].astype(str).str.len().max(), len(col_name)) + 2
-                        worksheet.set_column(col_num, col_num, max_len)
-
-        st.download_button(
-            "🌟 下载完整整合报告",
-            data=buffer.getvalue(),
-            file_name="Full_Consolidated_Report.xlsx",
-            mime="application/vnd.ms-excel",
-            use_container_width=True,
-            key="unique_orange_btn"  # 唯一标识符
-        )
-
-# ================== 页面样式优化 ==================
-st.markdown("""
-<style>
-/* 精准定位完整整合报告按钮 */
-div[data-testid="stDownloadButton"] button[data-testid="baseButton-unique_orange_btn"] {
-    background: #FFA500 !important;  /* 纯橙色背景 */
-    border: 2px solid #FF8C00 !important;  /* 深橙色边框 */
-    color: #000000 !important;  /* 黑色文字 */
-    font-weight: bold;
-}
-
-/* 悬停状态 */
-div[data-testid="stDownloadButton"] button[data-testid="baseButton-unique_orange_btn"]:hover {
-    background: #FF8C00 !important;
-    border-color: #FF6B00 !important;
-}
-
-/* 按下状态 */
-div[data-testid="stDownloadButton"] button[data-testid="baseButton-unique_orange_btn"]:active {
-    background: #FF6B00 !important;
-    border-color: #FF4500 !important;
-}
-
-/* 其他按钮保持绿色 */
-.stDownloadButton button:not([data-testid="baseButton-unique_orange_btn"]) {
-    background: linear-gradient(45deg, #32CD32, #228B22) !important;
-    color: white !important;
-}
-</style>
-""", unsafe_allow_html=True)
-
-#####################
-#我想設計一個精美的python的streamlit app解決，要有title和subheader，app用簡單中文
-
-#我有以下3個部分想進行:
-
-#1. 在左邊建立一個excel的uploader，容許用家upload多於一個xlsx或xlsm格式的excel，當用家upload完成並確認後，先檢查用家upload的excel是否檔案名字內都有"MC Info"字眼，例如"MC Info ABC"便是合格，"Info ABC"則是不合格的檔名。如果任一檔案名稱不合格的話就提醒一下用家並讓他重新upload，如果所有檔案名稱都合格的話就進行以下動作:
-
-#把已upload的excel各自的以下條件位置的內容全部抽出並以表格顯示出來，列名分別為”CD Code”和”Machine Type”和”S/N#”，sheet名為”MC Info”:
-
-#-D1格子內容
-#-C列內容(C21開始一直向下，直到對應的B列沒有內容為止的C列內容)
-#-D列內容(D21開始一直向下，直到對應的B列沒有內容為止的D列內容)
-
-#最後在subheader旁加一個download button容易用家download已整合的資料表格。
-
-#2. 在右邊建立另一個excel的uploader，容許用家upload多於一個xlsx或xlsm格式的excel，當用家upload完成並確認後，先檢查用家upload的excel是否檔案名字內都有"relocation"字眼，例如"MC Info Relocation_sheet"或者”HuaYun-★Relocation_sheet-Y53636”便是合格，"HuaYun-★Y53636"則是不合格的檔名。如果任一檔案名稱不合格的話就提醒一下用家並讓他重新upload，如果所有檔案名稱都合格的話就進行以下動作:
-
-#把已upload的excel各自的以下條件位置的內容全部抽出並以表格顯示出來，列名分別為”From_CD Code”和”To_CD Code”和”Machine Type”和”S/N#”，sheet名為”Relocation”:
-
-#-D25格子內容
-#-D27格子內容
-#1. B列內容(B33開始一直向下的B列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
-#2. E列內容(E33開始一直向下的E列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
-
-
-#在抓取"relocation"檔案資料時，非固定內容的抓取位置保持現有的做法作為優先做法，如果找不到可提取資料，就試用以下第二方案抓取：
-#1. B列內容(B34開始一直向下的B列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
-#2. E列內容(E34開始一直向下的E列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
-#在讀取"relocation"檔案時，其中一個檔案如果出現读取失敗ERROR: index 8 is out of bounds for axis 0 with size 8，除了要解決讀取問題，在已正常讀取亦要通知用家已正常讀取。
-
-#在抓取"relocation"檔案資料時，非固定內容的抓取位置的做法，如果第一和第二個方案都找不到可提取資料，就試用以下第三方案抓取：
-#1. B列內容(B34開始一直向下的B列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
-#2. E列內容(E34開始一直向下的E列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
-
-
-
-
-#最後在subheader旁加一個download button容易用家download已整合的資料表格。
-
-
-#3. 當以上兩個動作都已完成，就在不影響以上兩個表格的情況下，在置中位置加一個名為"Combine"的download button讓用家download已整合的1和2部分的excel workbook，分兩張sheet放在同一個workbook就可以
-
-#在處理任何sheet時，如發現用家同一個檔案重複上載了，該重複的檔就只提取一次數據，不用重複提取，並通知用家該檔重複上傳了
-
-
-#- 由於現在已經有第1和第2部分的兩組file uploader，這兩組都不用再改。我現想再另外建立第3部分的excel uploader，同樣容許用家upload多於一個xlsx或xlsm式xls格式的excel，當用家upload完成並確認後，先檢查用家upload的excel是否檔案名字內是否有"Stock Machine"或"二合一"字眼，例如"二合一 STOCK MACHINE SHIPPPING INFORMATION-雷特"或者”ESE HK-Stock machine shipping information（SuZhou Bako)”便是合格的檔名，"HuaYun-★Y53636"則是不合格的檔名。如果任一檔案名稱不合格的話就提醒一下用家並讓他重新upload，當用家upload的檔案裡如果夾集excel以外的文件如word或pdf檔等等時，就像之前第1和第2部分的兩組file uploader那樣無視該些非excel的文檔即可，繼續操作。如果所有檔案名稱都合格的話就進行以下動作:
-
-#把已upload的excel先分為兩部分，第一部分是檔名裡沒有"二合一"字眼的，例如: "ESE HK-Stock machine shipping information（SuZhou Bako)"; 第二部分是檔名裡有"二合一"字眼的，例如: "二合一 STOCK MACHINE SHIPPPING INFORMATION-雷特";。
-
-#第一部分的數據提取，就是以下條件位置的內容全部抽出並以表格顯示出來，列名分別為"CD Code"和 "Machine Type"和"S/N#"，sheet名為"STOCK MACHINE SHIPPING INFO":
-
-#-C15格子內，找出有括號內的內容，例如: C15是"SuZhou Bako Optoelectronics Co.,Ltd.（#05910）No.2 Xinfeng East Road, Yangshe Town, Zhangjiagang City, Suzhou City"，那麼就只需提取#05910就可以
-#-B列內容(B21開始一直向下，直到對應的I列和J列同時沒有內容為止的B列內容)
-#-E列內容(E21開始一直向下，直到對應的I列和J列同時沒有內容為止的E列內容)
-
-#第一部分的表格可獨立供用家download
-
-#第二部分的數據提取，就是以下條件位置的內容全部抽出並以表格顯示出來，列名分別為"CD Code_End User"和"CD Code_Distributor"和"Machine Type"和"S/N#"，sheet名為"二合一STOCK MACHINE SHIPPING INFO":
-
-#-D15格子內容
-#-D16格子內容
-#-C列內容(C22開始一直向下，直到對應的J列沒有內容為止的C列內容)
-#-F列內容(F22開始一直向下，直到對應的J列沒有內容為止的F列內容)
-
-#第二部分的表格可獨立供用家download
-
-#另外:
-#-每一個用家download的表格內的每一張sheet中，不用顯示A列至D列都沒有內容的行數
-##-每一個用家download的表格內的每一張sheet，都在E列加一新列，列名為File_name，這列每一行的內容就是對應行數的數據的來源excel檔案名稱，假設該行的數據來源檔案的名稱是"MC Info Sheet－ Keweixin"，就顯示MC Info Sheet－ Keweixin
-
-#當以上動作都已完成後，就在不影響以上所有表格的情況下，本來在置中位置的整合download button改為讓用家download已整合三個excel uploader資料表的excel workbook，分四張sheet放在同一個workbook就可以，用家download的表格內的每一張sheet的第一行都要freeze掉，並且A至D列都要對整齊。
+import streamlit as st
+import os
+import time
+
+# 页面基本设置
+st.set_page_config(page_title="安贸数据整合系统", layout="wide")
+st.title("📁 安贸审核资料自动整合系统")
+st.subheader("YAMAHA 供应商数据自动化处理平台(MC sheet/ Relocation sheet/ STK MACHINE SHIPPPING info sheet)", divider="rainbow")
+
+# 标题先发送到浏览器，再加载pandas等较重的模块（冷启动时页面不会长时间空白）；
+# Excel读取引擎和导出引擎在各模块中按需导入，首次解析或导出时才加载
+from docs_cache import cache_from_env  # noqa: E402
+from docs_export import EXPORT_FORMATS, build_data_workbook, consolidated_sheets  # noqa: E402
+from docs_history import SqliteResultStore, history_from_env, history_path  # noqa: E402
+from docs_ingest import IngestWorker  # noqa: E402
+from docs_layout import layouts_from_env  # noqa: E402
+from docs_processing import FILE_PROCESSORS  # noqa: E402
+from docs_reconcile import reconcile  # noqa: E402
+from docs_scheduler import scheduler_from_env  # noqa: E402
+from docs_store import FILTER_FIELDS, ResultStore  # noqa: E402
+from docs_timing import TimingLog  # noqa: E402
+
+# 初始化session state
+session_defaults = {
+    'results': ResultStore(),
+    'export_cache': {},
+    'timing_log': TimingLog(),
+    'ingest': IngestWorker(),
+    'ingest_messages': [],
+    'reconcile_cache': None
+}
+for key, value in session_defaults.items():
+    if key not in st.session_state:
+        st.session_state[key] = value
+results = st.session_state.results
+timing_log = st.session_state.timing_log
+ingest = st.session_state.ingest
+
+@st.cache_resource
+def get_parse_cache():
+    """全部会话共享的解析缓存"""
+    return cache_from_env()
+
+@st.cache_resource
+def get_layout_registry():
+    """全部会话共享的版式记录"""
+    return layouts_from_env()
+
+@st.cache_resource
+def get_scheduler():
+    """全部会话共享的解析调度器（全服务器同时解析的文件数有上限，各会话轮流使用）"""
+    return scheduler_from_env()
+
+@st.cache_resource
+def get_history_db():
+    """全部会话共享的历史库连接"""
+    return history_from_env()
+
+def replace_results(store):
+    """切换结果存储：按数据版本缓存的导出文件和对账结果不再有效，重复上传按新存储中的文件判断"""
+    st.session_state.results = store
+    st.session_state.ingest.reset_seen(store.file_names())
+    st.session_state.export_cache = {}
+    st.session_state.reconcile_cache = None
+    return store
+
+def load_history_batch():
+    """载入历史批次：直接查询历史库中已保存的行，无需重新解析"""
+    replace_results(SqliteResultStore(get_history_db(), st.session_state.history_batch))
+    st.session_state.history_enabled = True
+
+def lazy_download_button(label, export_key, version, build, file_name, mime="application/vnd.ms-excel", **kwargs):
+    """按需生成导出文件：点击生成后才构建，数据版本不变时直接复用已生成的字节"""
+    cached = st.session_state.export_cache.get(export_key)
+    if cached is None or cached[0] != version:
+        if not st.button(f"📦 生成{label.split('下载', 1)[-1]}文件", key=f"build_{export_key}",
+                         use_container_width=True):
+            return
+        with timing_log.measure('export', export_key):
+            cached = (version, build())
+        st.session_state.export_cache[export_key] = cached
+
+    st.download_button(
+        label,
+        data=cached[1],
+        file_name=file_name,
+        mime=mime,
+        use_container_width=True,
+        **kwargs
+    )
+
+def stock_frames(export=False):
+    """整合报告和对账使用的四张表：Stock数据分为普通文件和二合一文件；export为True时还原为原始类型"""
+    frame = results.export_frame if export else results.frame
+    return (frame('mc_data'), frame('rel_data'), frame('stock_data', combined=False), frame('stock_data', combined=True))
+
+def reconciliation():
+    """跨表对账结果，数据版本不变时复用"""
+    cached = st.session_state.reconcile_cache
+    if cached is None or cached[0] != results.versions():
+        with timing_log.measure('reconcile', '跨表对账'):
+            cached = (results.versions(), reconcile(*stock_frames()))
+        st.session_state.reconcile_cache = cached
+    return cached[1]
+
+def paged_preview(data_key, filters, page_size):
+    """分页预览：按筛选条件在服务端查询，只把当前页的行发送到浏览器"""
+    with timing_log.measure('concat', data_key):
+        index = results.index(data_key)
+    rows = index.search(filters)
+    total = len(index) if rows is None else len(rows)
+    pages = max(1, -(-total // page_size))
+
+    page_key = f"page_{data_key}"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = 1
+    page = st.number_input(f"页码（共 {pages} 页）", min_value=1, max_value=pages, key=page_key)
+
+    with timing_log.measure('render', data_key):
+        st.dataframe(index.page(rows, page, page_size), use_container_width=True)
+    st.caption(f"🔎 共 {total} 行" + ("" if rows is None else f"（全部 {len(index)} 行）"))
+
+# ================== 统一文件处理区 ==================
+with st.container(border=True):
+    st.subheader("📁 统一数据上传处理区", divider="rainbow")
+    
+    uploaded_files = st.file_uploader(
+        "请上传所有相关文件（可多选，支持zip压缩包）",
+        type=['xls', 'xlsx', 'xlsm', 'zip'],
+        accept_multiple_files=True,
+        key="unified_uploader"
+    )
+
+    scheduler = get_scheduler()
+    max_workers = st.number_input(
+        f"本会话同时解析的文件数（全服务器上限 {scheduler.max_workers}，多人上传时轮流使用）",
+        min_value=1,
+        max_value=scheduler.max_workers,
+        value=1,
+        key="max_workers"
+    )
+
+    timing_log.enabled = st.checkbox("⏱️ 记录处理耗时（读取、提取、合并、渲染、导出各阶段）", key="timing_enabled")
+
+    parse_cache = get_parse_cache()
+    layout_registry = get_layout_registry()
+
+    # 历史库：开启后提取结果按上传批次和来源文件写入SQLite，预览和导出直接查询历史库
+    with st.expander("🗄️ 历史批次（SQLite）"):
+        history_enabled = st.checkbox("💾 将提取结果保存到历史库（刷新页面或重启后可直接载入）", key="history_enabled")
+        if history_enabled and not isinstance(results, SqliteResultStore):
+            results = replace_results(SqliteResultStore.create(get_history_db(), results))
+        elif not history_enabled and isinstance(results, SqliteResultStore):
+            memory_store = ResultStore()
+            for file_name, file_type, data_key, data in results.items():
+                memory_store.add(file_type, data_key, file_name, data)
+            results = replace_results(memory_store)
+
+        # 未开启且历史库文件还不存在时不打开（打开会新建库文件）
+        history_exists = history_enabled or os.path.exists(history_path())
+        batches = {batch['batch_id']: batch for batch in get_history_db().batches()} if history_exists else {}
+        if batches:
+            st.selectbox(
+                "历史批次",
+                list(batches),
+                format_func=lambda batch_id: (f"#{batch_id}  {batches[batch_id]['created_at']}"
+                                              f"（{batches[batch_id]['files']} 个文件，{batches[batch_id]['rows']} 行）"),
+                key="history_batch"
+            )
+            st.button("📂 载入所选批次", on_click=load_history_batch, disabled=ingest.busy, use_container_width=True)
+            if isinstance(results, SqliteResultStore):
+                st.caption(f"📌 当前批次：#{results.batch_id}")
+        else:
+            st.caption("暂无历史批次")
+
+    # 新上传的文件交给后台线程解析（zip压缩包逐个展开成员），页面重跑不会重复提交或中断正在进行的解析
+    if uploaded_files:
+        new_files = ingest.pending_uploads(uploaded_files)
+        if new_files:
+            ingest.submit(new_files, known_names=results.file_names(), max_workers=max_workers, cache=parse_cache,
+                          layouts=layout_registry, scheduler=scheduler)
+
+    if ingest.files or ingest.errors or len(results):
+        file_processors = FILE_PROCESSORS
+
+        # 按上传顺序合并已完成的结果，提示信息保留到之后的重跑
+        messages = st.session_state.ingest_messages
+        for result, duplicate in ingest.drain():
+            file_name = result.file_name
+            file_type = result.file_type
+            timing_log.add_file(file_name, result.timings)
+            if file_type is None:
+                if duplicate:
+                    messages.append(('warning', f"⏩ 已跳过重复文件：{file_name}"))
+                else:
+                    messages.append(('error', f"❌ 无法识别的文件类型：{file_name}"))
+                continue
+
+            if result.error:
+                messages.append(('error', result.error))
+                if result.fatal:
+                    continue
+
+            # 首次出现的Relocation版式（列标题行不同）：提示用户核对命中的抓取模式
+            if result.layout and result.layout.get('new'):
+                messages.append(('info', f"🆕 识别到新的Relocation版式：{file_name}（抓取模式 {result.layout['plan']}，"
+                                         f"指纹 {result.layout['fingerprint']}），请核对提取结果"))
+            # 同一版式的文件命中了不同的抓取模式：数据区位置与之前的文件不同，提示核对
+            if result.layout and result.layout.get('previous'):
+                messages.append(('warning', f"⚠️ 同一Relocation版式的抓取模式发生变化：{file_name}"
+                                            f"（指纹 {result.layout['fingerprint']}，{result.layout['previous']} → "
+                                            f"{result.layout['plan']}），请核对提取结果"))
+
+            processed_data = result.data
+            if processed_data is not None and not processed_data.empty:
+                with timing_log.measure('accumulate', file_name, kind='file'):
+                    results.add(file_type, file_processors[file_type]['data_key'], file_name, processed_data)
+            else:
+                messages.append(('warning', f"⚠️ 文件未包含有效数据：{file_name}"))
+
+        for level, message in messages + [('error', error) for error in ingest.errors]:
+            getattr(st, level)(message)
+
+        # 解析进度和逐个文件状态
+        done, total = ingest.progress()
+        st.progress(done / total if total else 1.0, text=f"📊 解析进度：{done} / {total}")
+        queue = scheduler.status(ingest)
+        if queue['queued']:
+            st.caption(f"🚦 服务器解析繁忙：本会话排在第 {queue['position']} 位，{queue['queued']} 个文件等待中"
+                       f"（正在解析 {queue['running']} 个，全服务器 {queue['active']} / {queue['max_workers']}）")
+        with st.expander("📋 文件处理状态", expanded=ingest.busy):
+            statuses = ingest.statuses()
+            st.dataframe({'文件': [name for name, _ in statuses], '状态': [status for _, status in statuses]},
+                         use_container_width=True)
+
+        # 显示成功统计
+        success_col1, success_col2, success_col3 = st.columns(3)
+        with success_col1:
+            st.info(f"✅ 成功处理MC文件数量：{results.count('mc_data')}")
+        with success_col2:
+            st.info(f"✅ 成功处理Relocation文件数量：{results.count('rel_data')}")
+        with success_col3:
+            st.info(f"✅ 成功处理Stock文件数量：{results.count('stock_data')}")
+
+        cache_stats = parse_cache.stats()
+        st.caption(f"⚡ 解析缓存：命中 {cache_stats['hits']} 次（磁盘 {cache_stats['disk_hits']} 次） / "
+                   f"未命中 {cache_stats['misses']} 次，缓存文件 {cache_stats['entries']} 个")
+
+        memory = results.memory_usage()
+        if 'database' in memory:
+            st.caption(f"🧠 本会话结果占用内存：{memory['total'] / 1024 ** 2:.1f} MB"
+                       f"（行数据保存在历史库，库文件 {memory['database'] / 1024 ** 2:.1f} MB）")
+        else:
+            st.caption(f"🧠 本会话结果占用内存：{memory['total'] / 1024 ** 2:.1f} MB"
+                       f"（文件分区 {memory['partitions'] / 1024 ** 2:.1f} MB，未压缩约 {memory['raw'] / 1024 ** 2:.1f} MB；"
+                       f"合并表及索引缓存 {(memory['frames'] + memory['indexes']) / 1024 ** 2:.1f} MB）")
+
+        layouts = layout_registry.entries()
+        if layouts:
+            with st.expander(f"🧩 已识别的Relocation版式（{len(layouts)} 种）"):
+                st.dataframe(layouts, use_container_width=True)
+
+        # 预览筛选（对三张表同时生效，不区分大小写，按包含关系匹配）
+        filter_cols = st.columns(len(FILTER_FIELDS) + 1)
+        filters = {}
+        for filter_col, field in zip(filter_cols, FILTER_FIELDS):
+            with filter_col:
+                filters[field] = st.text_input(f"🔍 {field}", key=f"filter_{field}")
+        with filter_cols[-1]:
+            page_size = st.selectbox("每页行数", (50, 100, 200, 500), key="page_size")
+
+        # 三栏并排显示
+        col1, col2, col3 = st.columns(3)
+        
+        # MC数据展示
+        with col1:
+            if results.count('mc_data'):
+                st.subheader("MC Info 数据", divider="blue")
+                paged_preview('mc_data', filters, page_size)
+                
+                lazy_download_button(
+                    "💾 下载MC数据",
+                    export_key="mc_data",
+                    version=results.version("mc_data"),
+                    build=lambda: build_data_workbook(results.export_frame('mc_data')),
+                    file_name="MC_Data.xlsx"
+                )
+
+        # Relocation数据展示
+        with col2:
+            if results.count('rel_data'):
+                st.subheader("Relocation 数据", divider="orange")
+                paged_preview('rel_data', filters, page_size)
+                
+                lazy_download_button(
+                    "💾 下载Relocation数据",
+                    export_key="rel_data",
+                    version=results.version("rel_data"),
+                    build=lambda: build_data_workbook(results.export_frame('rel_data')),
+                    file_name="Relocation_Data.xlsx"
+                )
+
+        # Stock数据展示
+        with col3:
+            if results.count('stock_data'):
+                st.subheader("Stock 数据", divider="violet")
+                paged_preview('stock_data', filters, page_size)
+                
+                lazy_download_button(
+                    "💾 下载Stock数据",
+                    export_key="stock_data",
+                    version=results.version("stock_data"),
+                    build=lambda: build_data_workbook(results.export_frame('stock_data')),
+                    file_name="Stock_Data.xlsx"
+                )
+
+# ================== 整合下载区 ==================
+if len(results):
+    st.divider()
+    with st.container(border=True):
+        st.subheader("🚀 数据整合下载区", divider="green")
+
+        # 跨表对账：按S/N#关联三类数据，勾选后对账结果同时作为附加sheet写入整合报告
+        reconcile_enabled = st.checkbox("🔍 跨表对账（来源缺失 / 重复序列号 / CD Code不一致）", key="reconcile_enabled")
+        if reconcile_enabled:
+            reconcile_sheets = reconciliation()
+            tabs = st.tabs([f"{name}（{len(df)}）" for name, df in reconcile_sheets.items()])
+            for tab, df in zip(tabs, reconcile_sheets.values()):
+                with tab:
+                    if df.empty:
+                        st.success("✅ 未发现问题")
+                    else:
+                        st.dataframe(df.head(1000), use_container_width=True)
+                        if len(df) > 1000:
+                            st.caption(f"仅显示前1000行（共 {len(df)} 行），完整结果请下载整合报告")
+
+        # 导出格式：大批量数据可选省内存的xlsx，或CSV / Parquet压缩包（sheet划分与xlsx相同）
+        export_format = st.selectbox(
+            "导出格式",
+            list(EXPORT_FORMATS),
+            format_func=lambda fmt: EXPORT_FORMATS[fmt]['label'],
+            key="export_format"
+        )
+        export_spec = EXPORT_FORMATS[export_format]
+
+        lazy_download_button(
+            "🌟 下载完整整合报告",
+            export_key="consolidated",
+            version=(results.versions(), reconcile_enabled, export_format),
+            build=lambda: export_spec['build']({
+                **consolidated_sheets(*stock_frames(export=True)),
+                **(reconciliation() if reconcile_enabled else {})
+            }),
+            file_name=f"Full_Consolidated_Report.{export_spec['extension']}",
+            mime=export_spec['mime'],
+            key="unique_orange_btn"  # 唯一标识符
+        )
+
+# ================== 处理耗时分析区 ==================
+if timing_log.records:
+    with st.expander("⏱️ 处理耗时分析"):
+        stage_col, file_col = st.columns([2, 3])
+        with stage_col:
+            st.markdown("**各阶段耗时**")
+            st.dataframe(timing_log.stage_summary(), use_container_width=True)
+        with file_col:
+            st.markdown("**最慢的文件**")
+            st.dataframe(timing_log.slowest_files(), use_container_width=True)
+
+        csv_col, json_col, clear_col = st.columns(3)
+        with csv_col:
+            st.download_button("📄 下载耗时CSV", data=timing_log.to_csv(), file_name="timings.csv",
+                               mime="text/csv", use_container_width=True)
+        with json_col:
+            st.download_button("📄 下载耗时JSON", data=timing_log.to_json(), file_name="timings.json",
+                               mime="application/json", use_container_width=True)
+        with clear_col:
+            if st.button("🧹 清空耗时记录", use_container_width=True):
+                timing_log.clear()
+                st.rerun()
+
+# ================== 页面样式优化 ==================
+st.markdown("""
+<style>
+/* 精准定位完整整合报告按钮 */
+div[data-testid="stDownloadButton"] button[data-testid="baseButton-unique_orange_btn"] {
+    background: #FFA500 !important;  /* 纯橙色背景 */
+    border: 2px solid #FF8C00 !important;  /* 深橙色边框 */
+    color: #000000 !important;  /* 黑色文字 */
+    font-weight: bold;
+}
+
+/* 悬停状态 */
+div[data-testid="stDownloadButton"] button[data-testid="baseButton-unique_orange_btn"]:hover {
+    background: #FF8C00 !important;
+    border-color: #FF6B00 !important;
+}
+
+/* 按下状态 */
+div[data-testid="stDownloadButton"] button[data-testid="baseButton-unique_orange_btn"]:active {
+    background: #FF6B00 !important;
+    border-color: #FF4500 !important;
+}
+
+/* 其他按钮保持绿色 */
+.stDownloadButton button:not([data-testid="baseButton-unique_orange_btn"]) {
+    background: linear-gradient(45deg, #32CD32, #228B22) !important;
+    color: white !important;
+}
+</style>
+""", unsafe_allow_html=True)
+
+# ================== 后台解析刷新 ==================
+# 后台线程仍在解析时定时重跑页面，已完成文件的数据逐步显示在上方表格中
+if ingest.busy:
+    time.sleep(0.5)
+    st.rerun()
+
+#####################
+#我想設計一個精美的python的streamlit app解決，要有title和subheader，app用簡單中文
+
+#我有以下3個部分想進行:
+
+#1. 在左邊建立一個excel的uploader，容許用家upload多於一個xlsx或xlsm格式的excel，當用家upload完成並確認後，先檢查用家upload的excel是否檔案名字內都有"MC Info"字眼，例如"MC Info ABC"便是合格，"Info ABC"則是不合格的檔名。如果任一檔案名稱不合格的話就提醒一下用家並讓他重新upload，如果所有檔案名稱都合格的話就進行以下動作:
+
+#把已upload的excel各自的以下條件位置的內容全部抽出並以表格顯示出來，列名分別為”CD Code”和”Machine Type”和”S/N#”，sheet名為”MC Info”:
+
+#-D1格子內容
+#-C列內容(C21開始一直向下，直到對應的B列沒有內容為止的C列內容)
+#-D列內容(D21開始一直向下，直到對應的B列沒有內容為止的D列內容)
+
+#最後在subheader旁加一個download button容易用家download已整合的資料表格。
+
+#2. 在右邊建立另一個excel的uploader，容許用家upload多於一個xlsx或xlsm格式的excel，當用家upload完成並確認後，先檢查用家upload的excel是否檔案名字內都有"relocation"字眼，例如"MC Info Relocation_sheet"或者”HuaYun-★Relocation_sheet-Y53636”便是合格，"HuaYun-★Y53636"則是不合格的檔名。如果任一檔案名稱不合格的話就提醒一下用家並讓他重新upload，如果所有檔案名稱都合格的話就進行以下動作:
+
+#把已upload的excel各自的以下條件位置的內容全部抽出並以表格顯示出來，列名分別為”From_CD Code”和”To_CD Code”和”Machine Type”和”S/N#”，sheet名為”Relocation”:
+
+#-D25格子內容
+#-D27格子內容
+#1. B列內容(B33開始一直向下的B列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
+#2. E列內容(E33開始一直向下的E列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
+
+
+#在抓取"relocation"檔案資料時，非固定內容的抓取位置保持現有的做法作為優先做法，如果找不到可提取資料，就試用以下第二方案抓取：
+#1. B列內容(B34開始一直向下的B列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
+#2. E列內容(E34開始一直向下的E列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
+#在讀取"relocation"檔案時，其中一個檔案如果出現读取失敗ERROR: index 8 is out of bounds for axis 0 with size 8，除了要解決讀取問題，在已正常讀取亦要通知用家已正常讀取。
+
+#在抓取"relocation"檔案資料時，非固定內容的抓取位置的做法，如果第一和第二個方案都找不到可提取資料，就試用以下第三方案抓取：
+#1. B列內容(B34開始一直向下的B列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
+#2. E列內容(E34開始一直向下的E列內容，直到對應的I列和H列首次同時沒有內容為止，只要對應的I列或H列任一有內容都可，只是當對應的I列和H列首次同時沒有內容才停止)
+
+
+
+
+#最後在subheader旁加一個download button容易用家download已整合的資料表格。
+
+
+#3. 當以上兩個動作都已完成，就在不影響以上兩個表格的情況下，在置中位置加一個名為"Combine"的download button讓用家download已整合的1和2部分的excel workbook，分兩張sheet放在同一個workbook就可以
+
+#在處理任何sheet時，如發現用家同一個檔案重複上載了，該重複的檔就只提取一次數據，不用重複提取，並通知用家該檔重複上傳了
+
+
+#- 由於現在已經有第1和第2部分的兩組file uploader，這兩組都不用再改。我現想再另外建立第3部分的excel uploader，同樣容許用家upload多於一個xlsx或xlsm式xls格式的excel，當用家upload完成並確認後，先檢查用家upload的excel是否檔案名字內是否有"Stock Machine"或"二合一"字眼，例如"二合一 STOCK MACHINE SHIPPPING INFORMATION-雷特"或者”ESE HK-Stock machine shipping information（SuZhou Bako)”便是合格的檔名，"HuaYun-★Y53636"則是不合格的檔名。如果任一檔案名稱不合格的話就提醒一下用家並讓他重新upload，當用家upload的檔案裡如果夾集excel以外的文件如word或pdf檔等等時，就像之前第1和第2部分的兩組file uploader那樣無視該些非excel的文檔即可，繼續操作。如果所有檔案名稱都合格的話就進行以下動作:
+
+#把已upload的excel先分為兩部分，第一部分是檔名裡沒有"二合一"字眼的，例如: "ESE HK-Stock machine shipping information（SuZhou Bako)"; 第二部分是檔名裡有"二合一"字眼的，例如: "二合一 STOCK MACHINE SHIPPPING INFORMATION-雷特";。
+
+#第一部分的數據提取，就是以下條件位置的內容全部抽出並以表格顯示出來，列名分別為"CD Code"和 "Machine Type"和"S/N#"，sheet名為"STOCK MACHINE SHIPPING INFO":
+
+#-C15格子內，找出有括號內的內容，例如: C15是"SuZhou Bako Optoelectronics Co.,Ltd.（#05910）No.2 Xinfeng East Road, Yangshe Town, Zhangjiagang City, Suzhou City"，那麼就只需提取#05910就可以
+#-B列內容(B21開始一直向下，直到對應的I列和J列同時沒有內容為止的B列內容)
+#-E列內容(E21開始一直向下，直到對應的I列和J列同時沒有內容為止的E列內容)
+
+#第一部分的表格可獨立供用家download
+
+#第二部分的數據提取，就是以下條件位置的內容全部抽出並以表格顯示出來，列名分別為"CD Code_End User"和"CD Code_Distributor"和"Machine Type"和"S/N#"，sheet名為"二合一STOCK MACHINE SHIPPING INFO":
+
+#-D15格子內容
+#-D16格子內容
+#-C列內容(C22開始一直向下，直到對應的J列沒有內容為止的C列內容)
+#-F列內容(F22開始一直向下，直到對應的J列沒有內容為止的F列內容)
+
+#第二部分的表格可獨立供用家download
+
+#另外:
+#-每一個用家download的表格內的每一張sheet中，不用顯示A列至D列都沒有內容的行數
+##-每一個用家download的表格內的每一張sheet，都在E列加一新列，列名為File_name，這列每一行的內容就是對應行數的數據的來源excel檔案名稱，假設該行的數據來源檔案的名稱是"MC Info Sheet－ Keweixin"，就顯示MC Info Sheet－ Keweixin
+
+#當以上動作都已完成後，就在不影響以上所有表格的情況下，本來在置中位置的整合download button改為讓用家download已整合三個excel uploader資料表的excel workbook，分四張sheet放在同一個workbook就可以，用家download的表格內的每一張sheet的第一行都要freeze掉，並且A至D列都要對整齊。
@@ -0,0 +1,214 @@
+"""生成用于测试和基准测试的模拟供应商工作簿
+
+覆盖MC Info、Relocation（模式1~4四种布局）、普通Stock和二合一Stock模板，
+支持xls / xlsx / xlsm格式，可配置数据行数、每种模板的文件数和表尾填充行数。
+--numeric-ids 使用纯数字的CD Code / S/N#（不写列标题行，数据区含一个空S/N#），--footer 在取值列下方写入签名区文字，
+两者同时使用时，整表读取的类型推断与只看数据区时不同。
+
+用法：python benchmarks/generate_workbooks.py out_dir --rows 80 --files 20 --formats xlsx xls
+
+写xls需要安装xlwt（pip install xlwt）。
+"""
+import argparse
+import os
+import random
+
+TEMPLATES = ('MC', 'REL1', 'REL2', 'REL3', 'REL4', 'STOCK', 'STOCK_COMBINED')
+FORMATS = ('xlsx', 'xlsm', 'xls')
+
+SUPPLIERS = ('Keweixin', 'SuZhou Bako', 'HuaYun', '雷特', 'ESE HK', 'Shenzhen Kaifa')
+MACHINE_TYPES = ('YSM10', 'YSM20R', 'YRM20', 'YSM40R', 'YSP10', 'YRi-V', 'YSi-12')
+FILE_NAMES = {
+    'MC': "MC Info Sheet－ {supplier}-{index:04d}",
+    'REL': "{supplier}-★Relocation_sheet-Y{index:05d}-L{layout}",
+    'STOCK': "{supplier}-Stock machine shipping information-{index:04d}",
+    'STOCK_COMBINED': "二合一 STOCK MACHINE SHIPPPING INFORMATION-{supplier}-{index:04d}",
+}
+# 表头区域的文字标签，使各列与真实模板一样带有文本内容
+HEADER_LABELS = ('Company', 'Address', 'Contact', 'Tel', 'Date', 'Audit No.')
+
+
+def _cd_code(rng, numeric=False):
+    if numeric:
+        return rng.randint(1000, 99999)
+    return f"#{rng.randint(1, 99999):05d}"
+
+
+def _serial(rng, numeric=False):
+    # 真实数据中S/N#既有纯数字也有带字母的编号
+    if numeric or rng.random() < 0.5:
+        return rng.randint(10 ** 6, 10 ** 7 - 1)
+    return f"{rng.choice('ABCDEFGHJK')}{rng.randint(10 ** 5, 10 ** 6 - 1)}"
+
+
+def _grid(n_rows, n_cols=14):
+    return [[None] * n_cols for _ in range(n_rows)]
+
+
+def _header(grid, rng, supplier):
+    for row in range(min(10, len(grid))):
+        grid[row][0] = HEADER_LABELS[row % len(HEADER_LABELS)]
+        grid[row][1] = f"{supplier} {HEADER_LABELS[row % len(HEADER_LABELS)].lower()}"
+
+
+def _padding(grid, start, padding_rows, rng):
+    """表尾填充行：备注和签名区，只占用K列之后的位置，不影响提取结果"""
+    for row in range(start, start + padding_rows):
+        grid[row][10] = f"Remark {rng.randint(1, 999)}"
+        grid[row][12] = rng.random()
+
+
+def _footer(grid, start):
+    """表尾签名区：文字写在B~F列，即各模板取值的列"""
+    for offset, label in enumerate(('Signature', 'Date')):
+        for col in range(1, 6):
+            grid[start + offset][col] = label
+
+
+def build_rows(template, rows, rng, padding_rows=0, numeric_ids=False, footer=False):
+    """返回模板的二维单元格数组（None为空单元格）
+
+    numeric_ids为True时CD Code和S/N#为纯数字、不写列标题行，且数据区中间一行的S/N#为空；
+    footer为True时在表尾写入签名区。
+    """
+    supplier = rng.choice(SUPPLIERS)
+    if template == 'MC':
+        first = 20
+    elif template == 'REL1':
+        first = 32
+    elif template == 'REL2':
+        first = 33
+    elif template == 'REL3':
+        first = 100
+    elif template == 'REL4':
+        first = 200
+    elif template == 'STOCK':
+        first = 20
+    else:
+        first = 21
+    end = first + rows
+    grid = _grid(end + padding_rows + 4)
+    _header(grid, rng, supplier)
+
+    if template == 'MC':
+        grid[10][2] = 'CD Code'
+        grid[10][3] = _cd_code(rng, numeric_ids)
+        if not numeric_ids:
+            grid[19][1:4] = ['No.', 'Machine Type', 'S/N#']
+        for i, row in enumerate(range(first, end)):
+            grid[row][0] = i + 1
+            grid[row][1] = 'YAMAHA'
+            grid[row][2] = rng.choice(MACHINE_TYPES)
+            grid[row][3] = _serial(rng, numeric_ids)
+    elif template.startswith('REL'):
+        grid[24][2] = 'From CD Code'
+        grid[24][3] = _cd_code(rng, numeric_ids)
+        grid[26][2] = 'To CD Code'
+        grid[26][3] = _cd_code(rng, numeric_ids)
+        if not numeric_ids:
+            grid[31][1:9] = ['Machine Type', '', '', 'S/N#', '', 'Qty', 'From', 'To']
+        if template == 'REL1':
+            # 模式1：第33行起G/H列有内容
+            for row in range(first, end):
+                grid[row][6] = 1
+                grid[row][7] = 'Y'
+        else:
+            # 模式2~4：第33行G/H列为空（只有I列），第34行起H/I列连续有内容直到数据结束
+            grid[32][8] = 'Y'
+            for row in range(33, end):
+                grid[row][7] = 'Y'
+                grid[row][8] = 'Y'
+        for row in range(first, end):
+            grid[row][1] = rng.choice(MACHINE_TYPES)
+            grid[row][4] = _serial(rng, numeric_ids)
+    elif template == 'STOCK':
+        grid[14][2] = f"{supplier} Co.,Ltd.（{_cd_code(rng, numeric_ids)}）No.{rng.randint(1, 99)} Xinfeng East Road"
+        if not numeric_ids:
+            grid[19][1:10] = ['Machine Type', '', '', 'S/N#', '', '', '', 'Ship', 'Date']
+        for row in range(first, end):
+            grid[row][1] = rng.choice(MACHINE_TYPES)
+            grid[row][4] = _serial(rng, numeric_ids)
+            grid[row][8] = 'Y'
+            grid[row][9] = f"2024-{rng.randint(1, 12):02d}"
+    else:
+        grid[14][2] = 'End User'
+        grid[14][3] = _cd_code(rng, numeric_ids)
+        grid[15][2] = 'Distributor'
+        grid[15][3] = _cd_code(rng, numeric_ids)
+        if not numeric_ids:
+            grid[20][2:10] = ['Machine Type', '', '', 'S/N#', '', '', '', 'Ship']
+        for row in range(first, end):
+            grid[row][2] = rng.choice(MACHINE_TYPES)
+            grid[row][5] = _serial(rng, numeric_ids)
+            grid[row][9] = 'Y'
+
+    if numeric_ids and rows > 1:
+        serial_col = {'MC': 3, 'STOCK': 4, 'STOCK_COMBINED': 5}.get(template, 4)
+        grid[first + rows // 2][serial_col] = None
+    _padding(grid, end + 1, padding_rows, rng)
+    if footer:
+        _footer(grid, end + 1 + padding_rows)
+    return supplier, grid
+
+
+def write_workbook(path, grid):
+    """按扩展名写出工作簿"""
+    if path.endswith('.xls'):
+        import xlwt
+
+        book = xlwt.Workbook()
+        sheet = book.add_sheet('Sheet1')
+        for r, values in enumerate(grid):
+            for c, value in enumerate(values):
+                if value is not None:
+                    sheet.write(r, c, value)
+        book.save(path)
+        return
+
+    from openpyxl import Workbook
+
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet('Sheet1')
+    for values in grid:
+        sheet.append(values)
+    book.save(path)
+
+
+def generate(out_dir, templates=TEMPLATES, formats=('xlsx',), rows=80, files=1, padding_rows=0, seed=0,
+             numeric_ids=False, footer=False):
+    """生成工作簿，返回 [(template, format, path)]"""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    generated = []
+    for template in templates:
+        for fmt in formats:
+            for index in range(files):
+                supplier, grid = build_rows(template, rows, rng, padding_rows, numeric_ids, footer)
+                pattern = FILE_NAMES['REL' if template.startswith('REL') else template]
+                name = pattern.format(supplier=supplier, index=index, layout=template[-1])
+                path = os.path.join(out_dir, f"{name}.{fmt}")
+                write_workbook(path, grid)
+                generated.append((template, fmt, path))
+    return generated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成模拟供应商工作簿")
+    parser.add_argument("out_dir")
+    parser.add_argument("--templates", nargs='+', choices=TEMPLATES, default=list(TEMPLATES))
+    parser.add_argument("--formats", nargs='+', choices=FORMATS, default=['xlsx'])
+    parser.add_argument("--rows", type=int, default=80, help="每个文件的机器数据行数")
+    parser.add_argument("--files", type=int, default=1, help="每种模板、每种格式的文件数")
+    parser.add_argument("--padding-rows", type=int, default=0, help="表尾不参与提取的填充行数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--numeric-ids", action='store_true', help="CD Code和S/N#使用纯数字，数据区含一个空S/N#")
+    parser.add_argument("--footer", action='store_true', help="在取值列下方写入签名区文字")
+    args = parser.parse_args(argv)
+
+    generated = generate(args.out_dir, args.templates, args.formats, args.rows, args.files,
+                         args.padding_rows, args.seed, args.numeric_ids, args.footer)
+    print(f"已生成 {len(generated)} 个文件：{args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
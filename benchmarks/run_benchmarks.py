@@ -0,0 +1,181 @@
+"""基准测试：按模板和数据规模分别计时 打开 / 提取 / 累积 / 导出 四个阶段
+
+用法：
+    python benchmarks/run_benchmarks.py -o bench.json
+    python benchmarks/run_benchmarks.py --rows 50 100 --files 20 --formats xlsx xls -o bench.json
+    python benchmarks/run_benchmarks.py --export-format xlsx_stream -o bench.json
+    python benchmarks/run_benchmarks.py --compare baseline.json bench.json
+
+结果为JSON（含git提交号和环境信息），可用 --compare 在两次提交之间对比。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from docs_export import EXPORT_FORMATS, report_sheet  # noqa: E402
+from docs_processing import (FILE_PROCESSORS, classify_file, extract_combined_stock_rows,  # noqa: E402
+                             extract_mc_rows, extract_normal_stock_rows, extract_rel_rows)
+from docs_reader import read_template, template_key  # noqa: E402
+from docs_store import ResultStore  # noqa: E402
+from generate_workbooks import TEMPLATES, generate  # noqa: E402
+
+STAGES = ('open', 'extract', 'accumulate', 'export')
+EXTRACTORS = {
+    'MC': extract_mc_rows,
+    'REL': extract_rel_rows,
+    'STOCK': extract_normal_stock_rows,
+    'STOCK_COMBINED': extract_combined_stock_rows,
+}
+
+
+def _named(content, name):
+    file = BytesIO(content)
+    file.name = name
+    return file
+
+
+def bench_case(paths, repeat, export_format='xlsx'):
+    """对一组同模板、同格式的文件计时，返回各阶段耗时（秒，取多次运行的中位数）"""
+    files = []
+    for path in paths:
+        with open(path, 'rb') as fh:
+            name = os.path.basename(path)
+            files.append((classify_file(name), name, fh.read()))
+
+    timings = {stage: [] for stage in STAGES}
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frames = [read_template(_named(content, name), file_type) for file_type, name, content in files]
+        timings['open'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        extracted = [EXTRACTORS[template_key(file_type, name)](df, name)
+                     for (file_type, name, _), df in zip(files, frames)]
+        timings['extract'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        store = ResultStore()
+        for (file_type, name, _), data in zip(files, extracted):
+            if not data.empty:
+                store.add(file_type, FILE_PROCESSORS[file_type]['data_key'], name, data)
+        sheets = {}
+        for file_type, name, _ in files:
+            data_key = FILE_PROCESSORS[file_type]['data_key']
+            combined = '二合一' in name if file_type == 'STOCK' else None
+            store.frame(data_key, combined=combined)
+            sheets[report_sheet(file_type, name)] = (data_key, combined)
+        timings['accumulate'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        EXPORT_FORMATS[export_format]['build']({sheet: store.export_frame(*key) for sheet, key in sheets.items()})
+        timings['export'].append(time.perf_counter() - start)
+        rows = sum(len(data) for data in extracted)
+
+    return {stage: statistics.median(values) for stage, values in timings.items()}, rows
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(templates, formats, row_counts, files, padding_rows, repeat, export_format='xlsx'):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in row_counts:
+            for template in templates:
+                for fmt in formats:
+                    out_dir = os.path.join(tmp, f"{template}-{fmt}-{rows}")
+                    paths = [path for _, _, path in generate(out_dir, [template], [fmt], rows, files, padding_rows)]
+                    timings, extracted_rows = bench_case(paths, repeat, export_format)
+                    for stage, seconds in timings.items():
+                        results.append({
+                            'template': template,
+                            'format': fmt,
+                            'rows': rows,
+                            'files': files,
+                            'stage': stage,
+                            'seconds': round(seconds, 6),
+                            'per_file_ms': round(seconds / files * 1000, 3),
+                            'extracted_rows': extracted_rows
+                        })
+                    print(f"{template:<15}{fmt:<6}{rows:>6} 行  " +
+                          "  ".join(f"{stage} {timings[stage] * 1000:8.1f}ms" for stage in STAGES))
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'files': files,
+            'padding_rows': padding_rows,
+            'repeat': repeat,
+            'export_format': export_format
+        },
+        'results': results
+    }
+
+
+def compare(baseline_path, current_path):
+    """逐项对比两次基准测试结果，比值小于1表示变快"""
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = json.load(fh)
+    with open(current_path, encoding='utf-8') as fh:
+        current = json.load(fh)
+
+    def index(report):
+        return {(r['template'], r['format'], r['rows'], r['stage']): r['seconds'] for r in report['results']}
+
+    base, cur = index(baseline), index(current)
+    print(f"基准：{baseline['meta'].get('commit')}  当前：{current['meta'].get('commit')}")
+    print(f"{'template':<15}{'format':<7}{'rows':>6}  {'stage':<11}{'基准ms':>10}{'当前ms':>10}{'比值':>8}")
+    for key in sorted(base.keys() & cur.keys()):
+        ratio = cur[key] / base[key] if base[key] else float('nan')
+        print(f"{key[0]:<15}{key[1]:<7}{key[2]:>6}  {key[3]:<11}{base[key] * 1000:>10.1f}{cur[key] * 1000:>10.1f}{ratio:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="安贸数据整合基准测试")
+    parser.add_argument("--templates", nargs='+', choices=TEMPLATES, default=list(TEMPLATES))
+    parser.add_argument("--formats", nargs='+', choices=('xlsx', 'xlsm', 'xls'), default=['xlsx', 'xls'])
+    parser.add_argument("--rows", nargs='+', type=int, default=[20, 80], help="每个文件的数据行数（可多个）")
+    parser.add_argument("--files", type=int, default=10, help="每组文件数")
+    parser.add_argument("--padding-rows", type=int, default=0, help="表尾不参与提取的填充行数")
+    parser.add_argument("--repeat", type=int, default=3, help="每组重复次数（取中位数）")
+    parser.add_argument("--export-format", choices=list(EXPORT_FORMATS), default='xlsx', help="导出阶段使用的格式")
+    parser.add_argument("-o", "--output", help="结果JSON文件")
+    parser.add_argument("--compare", nargs=2, metavar=('BASELINE', 'CURRENT'), help="对比两个结果JSON")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args.templates, args.formats, args.rows, args.files, args.padding_rows, args.repeat,
+                 args.export_format)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""冷启动基准测试：在全新的解释器中运行上传页面，计时到首次渲染（页面标题）和首轮脚本结束
+
+用法：
+    python benchmarks/startup_benchmark.py -o startup.json
+    python benchmarks/startup_benchmark.py --runs 10 --max-first-render 1.5
+    python benchmarks/startup_benchmark.py --compare baseline.json startup.json
+
+每次运行都启动新的Python进程（模块均未导入），页面由streamlit的AppTest执行，不需要浏览器。
+同时检查首轮渲染后已加载的模块：Excel读取 / 导出引擎和未使用的可视化包在此时不应被导入。
+超过 --max-first-render / --max-render 或加载了不应加载的模块时以非零状态退出。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_benchmarks import _git_commit  # noqa: E402
+
+PAGE = os.path.join(ROOT, '01_Docs_upload.py')
+# 首次解析 / 导出时才需要的引擎
+ENGINE_MODULES = ('openpyxl', 'xlrd', 'xlsxwriter', 'python_calamine')
+# requirements.txt中本页面不使用的可视化和扩展包
+UNUSED_MODULES = ('matplotlib', 'seaborn', 'plotly', 'streamlit_extras', 'streamlit_lottie',
+                  'streamlit_option_menu', 'streamlit_authenticator')
+# 仅作记录
+INFO_MODULES = ('pandas', 'numpy', 'pyarrow')
+
+# 子进程中执行：计时导入streamlit，再以AppTest运行页面，记录第一次调用st.title的时间
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+import streamlit as st
+imported = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+
+marks = {}
+title = st.title
+def first_render(*args, **kwargs):
+    marks.setdefault('title', time.perf_counter())
+    return title(*args, **kwargs)
+st.title = first_render
+
+app = AppTest.from_file(sys.argv[1], default_timeout=300)
+run_start = time.perf_counter()
+app.run()
+run_end = time.perf_counter()
+import_seconds = imported - start
+print(json.dumps({
+    'import_streamlit': import_seconds,
+    'first_render': import_seconds + marks.get('title', run_end) - run_start,
+    'render': import_seconds + run_end - run_start,
+    'exception': [str(e.value) for e in app.exception],
+    'modules': [name for name in sys.argv[2:] if name in sys.modules],
+}))
+'''
+
+METRICS = ('process', 'import_streamlit', 'first_render', 'render')
+
+
+def run_once(page, history_db):
+    """在新进程中运行一次页面，返回各项耗时（秒）和已加载的模块"""
+    env = dict(os.environ, ANMAO_HISTORY_DB=history_db)
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', CHILD, page, *ENGINE_MODULES, *UNUSED_MODULES, *INFO_MODULES],
+                               cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['process'] = time.perf_counter() - start
+    return result
+
+
+def run(page, runs):
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(runs):
+            sample = run_once(page, os.path.join(tmp, 'history.sqlite'))
+            samples.append(sample)
+            print(f"第 {i + 1} 次  " + "  ".join(f"{metric} {sample[metric] * 1000:8.1f}ms" for metric in METRICS))
+    loaded = sorted({name for sample in samples for name in sample['modules']})
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': runs
+        },
+        'results': {metric: round(statistics.median(sample[metric] for sample in samples), 6) for metric in METRICS},
+        'modules': loaded,
+        'exceptions': sorted({error for sample in samples for error in sample['exception']})
+    }
+
+
+def check(report, max_first_render=None, max_render=None):
+    """返回不满足要求的项"""
+    problems = [f"页面异常：{error}" for error in report['exceptions']]
+    unexpected = [name for name in report['modules'] if name in ENGINE_MODULES + UNUSED_MODULES]
+    if unexpected:
+        problems.append(f"首轮渲染时已加载：{', '.join(unexpected)}")
+    if max_first_render is not None and report['results']['first_render'] > max_first_render:
+        problems.append(f"首次渲染 {report['results']['first_render']:.3f}s 超过 {max_first_render}s")
+    if max_render is not None and report['results']['render'] > max_render:
+        problems.append(f"首轮脚本 {report['results']['render']:.3f}s 超过 {max_render}s")
+    return problems
+
+
+def compare(baseline_path, current_path):
+    """逐项对比两次结果，比值小于1表示变快"""
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = json.load(fh)
+    with open(current_path, encoding='utf-8') as fh:
+        current = json.load(fh)
+    print(f"基准：{baseline['meta'].get('commit')}  当前：{current['meta'].get('commit')}")
+    print(f"{'metric':<18}{'基准ms':>10}{'当前ms':>10}{'比值':>8}")
+    for metric in METRICS:
+        base, cur = baseline['results'].get(metric), current['results'].get(metric)
+        if base is None or cur is None:
+            continue
+        ratio = cur / base if base else float('nan')
+        print(f"{metric:<18}{base * 1000:>10.1f}{cur * 1000:>10.1f}{ratio:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="安贸数据整合页面冷启动基准测试")
+    parser.add_argument("--page", default=PAGE, help="页面脚本")
+    parser.add_argument("--runs", type=int, default=5, help="运行次数（取中位数）")
+    parser.add_argument("--max-first-render", type=float, help="首次渲染的上限（秒）")
+    parser.add_argument("--max-render", type=float, help="首轮脚本结束的上限（秒）")
+    parser.add_argument("-o", "--output", help="结果JSON文件")
+    parser.add_argument("--compare", nargs=2, metavar=('BASELINE', 'CURRENT'), help="对比两个结果JSON")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    report = run(args.page, args.runs)
+    print("中位数  " + "  ".join(f"{metric} {report['results'][metric] * 1000:.1f}ms" for metric in METRICS))
+    print(f"首轮渲染后已加载：{', '.join(report['modules']) or '无'}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+    problems = check(report, args.max_first_render, args.max_render)
+    for problem in problems:
+        print(f"❌ {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
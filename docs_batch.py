@@ -0,0 +1,125 @@
+"""批量整合命令行：不经过浏览器，直接整合目录下的MC Info / Relocation / Stock Machine文件
+
+用法示例：
+    python docs_batch.py /data/audit_2024_06 -o Full_Consolidated_Report.xlsx -j 8
+    python docs_batch.py /data/audit_2024_06 -o out_csv --format csv
+    python docs_batch.py /data/audit_2024_06 -o audit.sqlite
+
+本模式不导入Streamlit。
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from docs_export import REPORT_WRITERS, report_sheet
+from docs_processing import EXCEL_EXTENSIONS, classify_file, process_file
+
+
+def iter_workbooks(root):
+    """按稳定顺序遍历目录树中的Excel文件，返回 (相对路径, 绝对路径)"""
+    if os.path.isfile(root):
+        yield os.path.basename(root), root
+        return
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith(EXCEL_EXTENSIONS) and not file_name.startswith('~$'):
+                path = os.path.join(dir_path, file_name)
+                yield os.path.relpath(path, root), path
+
+
+def _process_path(job):
+    """子进程入口：读取文件并按类型提取"""
+    file_type, file_name, path = job
+    with open(path, 'rb') as fh:
+        file = BytesIO(fh.read())
+    file.name = file_name
+    return process_file(file_type, file)
+
+
+def run_batch(root, writer, max_workers=None, log=print):
+    """整合root下的全部文件并写入writer，返回统计字典"""
+    stats = {'files': 0, 'succeeded': 0, 'failed': 0, 'empty': 0, 'skipped': 0, 'rows': 0}
+    jobs = []
+    for rel_path, path in iter_workbooks(root):
+        # 与网页上传一致，按文件名识别类型
+        file_name = os.path.basename(rel_path)
+        file_type = classify_file(file_name)
+        if not file_type:
+            stats['skipped'] += 1
+            log(f"❌ 无法识别的文件类型：{rel_path}")
+            continue
+        jobs.append((file_type, file_name, path))
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers <= 1:
+        results = map(_process_path, jobs)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        results = executor.map(_process_path, jobs, chunksize=4)
+
+    try:
+        for (file_type, file_name, path), result in zip(jobs, results):
+            stats['files'] += 1
+            if result.error:
+                stats['failed'] += 1
+                log(result.error)
+                continue
+            if result.data is None or result.data.empty:
+                stats['empty'] += 1
+                log(f"⚠️ 文件未包含有效数据：{path}")
+                continue
+            writer.write(report_sheet(file_type, file_name), result.data)
+            stats['succeeded'] += 1
+            stats['rows'] += len(result.data)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return stats
+
+
+def _output_format(output, fmt):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(output)[1].lower()
+    if ext in ('.sqlite', '.sqlite3', '.db'):
+        return 'sqlite'
+    if ext == '.xlsx':
+        return 'xlsx'
+    return 'csv'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="安贸审核资料批量整合（命令行模式）")
+    parser.add_argument("root", help="要整合的目录（递归遍历）或单个文件")
+    parser.add_argument("-o", "--output", default="Full_Consolidated_Report.xlsx",
+                        help="输出文件：.xlsx为四张sheet的整合报告，.sqlite/.db为SQLite，其他视为CSV目录")
+    parser.add_argument("--format", choices=sorted(REPORT_WRITERS), help="输出格式（默认按输出文件扩展名判断）")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="并行进程数（默认CPU核数）")
+    parser.add_argument("-q", "--quiet", action="store_true", help="只输出最终统计")
+    args = parser.parse_args(argv)
+
+    fmt = _output_format(args.output, args.format)
+    writer = REPORT_WRITERS[fmt](args.output)
+    log = (lambda message: None) if args.quiet else (lambda message: print(message, file=sys.stderr))
+
+    start = time.perf_counter()
+    try:
+        stats = run_batch(args.root, writer, max_workers=args.workers, log=log)
+    finally:
+        writer.close()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    print(f"文件 {stats['files']} 个（成功 {stats['succeeded']}，无有效数据 {stats['empty']}，"
+          f"失败 {stats['failed']}，无法识别 {stats['skipped']}），共 {stats['rows']} 行")
+    print(f"耗时 {elapsed:.2f}s，{stats['files'] / elapsed:.1f} 文件/s，{stats['rows'] / elapsed:.0f} 行/s")
+    print(f"输出：{args.output}（{fmt}）")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
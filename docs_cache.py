@@ -0,0 +1,156 @@
+"""解析结果缓存：按上传内容哈希 + 模板类型缓存提取出的行，内存层和可选磁盘层均按LRU淘汰"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# 提取规则变化时递增，避免磁盘层返回旧规则的结果
+CACHE_VERSION = 2
+
+
+def cache_key(template, content, reader):
+    """由模板类型、读取后端（docs_reader.reader_identity）和文件字节内容生成缓存键
+
+    键中包含pandas版本：升级pandas后磁盘层的旧pickle不再命中（可能无法读取或类型推断不同）。
+    """
+    digest = hashlib.sha256(content).hexdigest()
+    return f"v{CACHE_VERSION}-pd{pd.__version__}-{template}-{reader}-{digest}"
+
+
+class ParseCache:
+    """提取结果的两级LRU缓存（进程内共享，线程安全）
+
+    max_memory_bytes / max_disk_bytes 为各层的容量上限；disk_dir 为None时不启用磁盘层。
+    """
+
+    def __init__(self, max_memory_bytes=256 * 1024 ** 2, disk_dir=None, max_disk_bytes=1024 ** 3):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key, file_name):
+        """查询缓存，命中时返回以当前文件名标记File_name的副本，否则返回None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._tag(entry[0], file_name)
+
+        data = self._disk_get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._memory_put(key, data)
+        return self._tag(data, file_name)
+
+    def put(self, key, data):
+        """写入缓存（内存层，以及启用时的磁盘层）"""
+        with self._lock:
+            self._memory_put(key, data)
+        self._disk_put(key, data)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._memory),
+                'memory_bytes': self._memory_bytes
+            }
+
+    @staticmethod
+    def _tag(data, file_name):
+        data = data.copy()
+        if 'File_name' in data.columns:
+            data['File_name'] = file_name
+        return data
+
+    def _memory_put(self, key, data):
+        size = int(data.memory_usage(deep=True).sum())
+        if size > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[1]
+        self._memory[key] = (data, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    # ================== 磁盘层 ==================
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            data = pd.read_pickle(path)
+            if not isinstance(data, pd.DataFrame):
+                raise TypeError(f"缓存文件内容不是DataFrame：{type(data).__name__}")
+            # 以修改时间记录最近使用
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # 截断、损坏或不兼容的缓存文件：按未命中处理并删除，之后重新解析写入
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _disk_put(self, key, data):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            data.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self._disk_evict()
+
+    def _disk_evict(self):
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.pkl'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def cache_from_env():
+    """按环境变量创建缓存：ANMAO_CACHE_MEMORY_MB / ANMAO_CACHE_DIR / ANMAO_CACHE_DISK_MB"""
+    return ParseCache(
+        max_memory_bytes=int(float(os.environ.get('ANMAO_CACHE_MEMORY_MB', 256)) * 1024 ** 2),
+        disk_dir=os.environ.get('ANMAO_CACHE_DIR') or None,
+        max_disk_bytes=int(float(os.environ.get('ANMAO_CACHE_DISK_MB', 1024)) * 1024 ** 2)
+    )
@@ -0,0 +1,304 @@
+"""Excel导出：单表下载和四张sheet的完整整合报告（另有省内存xlsx、CSV压缩包和Parquet压缩包格式）"""
+import os
+import pickle
+import sqlite3
+import tempfile
+import zipfile
+from datetime import datetime
+from importlib.util import find_spec
+from io import BytesIO, TextIOWrapper
+
+import pandas as pd
+
+CONSOLIDATED_SHEETS = ("MC Info", "Relocation", "STOCK MACHINE SHIPPING INFO", "二合一STOCK MACHINE SHIPPING INFO")
+# 省内存模式估算列宽时抽样的行数
+WIDTH_SAMPLE_ROWS = 2000
+# CSV逐块写入的行数
+CSV_CHUNK_ROWS = 50000
+
+
+def _column_widths(df, sample_rows=None):
+    """各列的内容最大长度（含表头）；指定sample_rows时只按前后各一部分和随机抽样的行估算"""
+    if sample_rows is not None and len(df) > sample_rows:
+        half = sample_rows // 4
+        sample = pd.concat([df.head(half), df.tail(half),
+                            df.iloc[half:-half].sample(sample_rows - 2 * half, random_state=0)])
+    else:
+        sample = df
+    widths = {}
+    for col_name in df.columns:
+        max_len = sample[col_name].astype(str).str.len().max()
+        widths[col_name] = int(max(max_len, len(col_name))) if pd.notna(max_len) else len(col_name)
+    return widths
+
+
+def _format_sheet(worksheet, df):
+    """冻结首行，并按内容长度设置列宽"""
+    worksheet.freeze_panes(1, 0)
+    for col_num, width in enumerate(_column_widths(df).values()):
+        worksheet.set_column(col_num, col_num, width + 2)
+
+
+def build_data_workbook(df):
+    """单个数据表导出为xlsx字节（sheet名Sheet1）"""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False)
+        _format_sheet(writer.sheets["Sheet1"], df)
+    return buffer.getvalue()
+
+
+def consolidated_sheets(mc_data, rel_data, stock_data, combined_stock_data):
+    """整合报告的四张sheet：Stock数据分为普通文件和二合一文件两张"""
+    return dict(zip(CONSOLIDATED_SHEETS, (mc_data, rel_data, stock_data, combined_stock_data)))
+
+
+def build_consolidated_workbook(sheets):
+    """整合报告导出为xlsx字节，空表不写入"""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        for sheet_name, df in sheets.items():
+            if df is not None and not df.empty:
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+                _format_sheet(writer.sheets[sheet_name], df)
+    return buffer.getvalue()
+
+
+def build_streaming_workbook(sheets, sample_rows=WIDTH_SAMPLE_ROWS):
+    """整合报告的省内存导出：xlsxwriter constant_memory模式逐行写出，列宽按抽样估算
+
+    sheet布局、冻结的表头行和单元格内容与build_consolidated_workbook相同，空表不写入。
+    """
+    import xlsxwriter
+
+    buffer = BytesIO()
+    workbook = xlsxwriter.Workbook(buffer, {'constant_memory': True, 'nan_inf_to_errors': True})
+    header_format, datetime_format = _cell_formats(workbook)
+    try:
+        for sheet_name, df in sheets.items():
+            if df is not None and not df.empty:
+                _write_streaming_sheet(workbook, sheet_name, list(df.columns), _column_widths(df, sample_rows),
+                                       [df], header_format, datetime_format)
+    finally:
+        workbook.close()
+    return buffer.getvalue()
+
+
+def build_csv_zip(sheets):
+    """每张sheet一个CSV文件（UTF-8 BOM，Excel可直接打开）打包为zip，逐块写入压缩流"""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for sheet_name, df in sheets.items():
+            if df is None or df.empty:
+                continue
+            with archive.open(f"{sheet_name}.csv", 'w') as member:
+                text = TextIOWrapper(member, encoding='utf-8-sig', newline='')
+                for start in range(0, len(df), CSV_CHUNK_ROWS):
+                    df.iloc[start:start + CSV_CHUNK_ROWS].to_csv(text, header=start == 0, index=False)
+                text.flush()
+                text.detach()
+    return buffer.getvalue()
+
+
+# Parquet中可以原样保存的object列类型，其余（如同时含数字和文本的S/N#）按文本保存
+_PARQUET_OBJECT_TYPES = ('string', 'empty', 'integer', 'floating', 'mixed-integer-float', 'boolean', 'datetime', 'date')
+
+
+def _parquet_frame(df):
+    mixed = [col_name for col_name in df.columns if df[col_name].dtype == object
+             and pd.api.types.infer_dtype(df[col_name], skipna=True) not in _PARQUET_OBJECT_TYPES]
+    if not mixed:
+        return df
+    return df.assign(**{col_name: df[col_name].where(df[col_name].isna(), df[col_name].astype(str))
+                        for col_name in mixed})
+
+
+def build_parquet_zip(sheets):
+    """每张sheet一个Parquet文件打包为zip（需要pyarrow）"""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for sheet_name, df in sheets.items():
+            if df is not None and not df.empty:
+                with archive.open(f"{sheet_name}.parquet", 'w') as member:
+                    _parquet_frame(df).to_parquet(member, index=False)
+    return buffer.getvalue()
+
+
+# 整合报告的导出格式：页面按此生成格式选项、文件名和MIME类型
+EXPORT_FORMATS = {
+    'xlsx': {'label': 'Excel（xlsx）', 'extension': 'xlsx', 'mime': 'application/vnd.ms-excel',
+             'build': build_consolidated_workbook},
+    'xlsx_stream': {'label': 'Excel（xlsx，省内存模式）', 'extension': 'xlsx', 'mime': 'application/vnd.ms-excel',
+                    'build': build_streaming_workbook},
+    'csv': {'label': 'CSV（每张sheet一个文件，zip）', 'extension': 'zip', 'mime': 'application/zip',
+            'build': build_csv_zip},
+}
+if find_spec('pyarrow'):
+    EXPORT_FORMATS['parquet'] = {'label': 'Parquet（每张sheet一个文件，zip）', 'extension': 'zip',
+                                 'mime': 'application/zip', 'build': build_parquet_zip}
+
+
+# ================== 流式导出（批量模式） ==================
+def report_sheet(file_type, file_name):
+    """来源文件的行写入整合报告的哪一张sheet"""
+    if file_type == 'MC':
+        return CONSOLIDATED_SHEETS[0]
+    if file_type == 'REL':
+        return CONSOLIDATED_SHEETS[1]
+    return CONSOLIDATED_SHEETS[3] if '二合一' in file_name else CONSOLIDATED_SHEETS[2]
+
+
+class _SheetSpill:
+    """单张sheet的临时落盘区：按块保存DataFrame，同时累计列宽"""
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.columns = []
+        self.widths = {}
+        self.rows = 0
+
+    def append(self, df):
+        for col_name in df.columns:
+            if col_name not in self.widths:
+                self.columns.append(col_name)
+                self.widths[col_name] = len(col_name)
+            self.widths[col_name] = max(self.widths[col_name], int(df[col_name].astype(str).str.len().max()))
+        pickle.dump(df, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.rows += len(df)
+
+    def chunks(self):
+        self.file.seek(0)
+        while True:
+            try:
+                yield pickle.load(self.file)
+            except EOFError:
+                return
+
+
+class XlsxReportWriter:
+    """四张sheet整合报告的流式写入：各sheet的行先落盘，关闭时以constant_memory模式按固定顺序写出"""
+
+    def __init__(self, path):
+        self.path = path
+        self._spills = {}
+        self.rows_written = 0
+
+    def write(self, sheet_name, df):
+        self._spills.setdefault(sheet_name, _SheetSpill()).append(df)
+        self.rows_written += len(df)
+
+    def close(self):
+        import xlsxwriter
+
+        workbook = xlsxwriter.Workbook(self.path, {'constant_memory': True, 'nan_inf_to_errors': True})
+        header_format, datetime_format = _cell_formats(workbook)
+        try:
+            for sheet_name in CONSOLIDATED_SHEETS:
+                spill = self._spills.get(sheet_name)
+                if spill is None or not spill.rows:
+                    continue
+                _write_streaming_sheet(workbook, sheet_name, spill.columns, spill.widths, spill.chunks(),
+                                       header_format, datetime_format)
+        finally:
+            workbook.close()
+            for spill in self._spills.values():
+                spill.file.close()
+
+
+def _cell_formats(workbook):
+    """与to_excel一致的表头格式和日期格式"""
+    return (workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}),
+            workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'}))
+
+
+def _write_streaming_sheet(workbook, sheet_name, columns, widths, chunks, header_format, datetime_format):
+    """constant_memory模式下按行顺序写出一张sheet：冻结表头行，列宽取widths（内容长度 + 2）"""
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.freeze_panes(1, 0)
+    for col_num, col_name in enumerate(columns):
+        worksheet.set_column(col_num, col_num, widths[col_name] + 2)
+        worksheet.write_string(0, col_num, col_name, header_format)
+    row_num = 1
+    for chunk in chunks:
+        for values in chunk.reindex(columns=columns).itertuples(index=False, name=None):
+            for col_num, value in enumerate(values):
+                _write_cell(worksheet, row_num, col_num, value, datetime_format)
+            row_num += 1
+
+
+def _write_cell(worksheet, row_num, col_num, value, datetime_format):
+    """与to_excel一致：空值留空，NumPy标量转为Python值"""
+    if pd.isna(value):
+        return
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, datetime):
+        worksheet.write_datetime(row_num, col_num, value, datetime_format)
+    else:
+        worksheet.write(row_num, col_num, value)
+
+
+class CsvReportWriter:
+    """每张sheet一个CSV文件（UTF-8 BOM，Excel可直接打开），逐块追加写入
+
+    打开时删除目录中已有的各sheet文件，本次没有数据的sheet不会留下上次运行的结果。
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._columns = {}
+        self.rows_written = 0
+        os.makedirs(directory, exist_ok=True)
+        for sheet_name in CONSOLIDATED_SHEETS:
+            try:
+                os.remove(self._path(sheet_name))
+            except FileNotFoundError:
+                pass
+
+    def _path(self, sheet_name):
+        return os.path.join(self.directory, f"{sheet_name}.csv")
+
+    def write(self, sheet_name, df):
+        path = self._path(sheet_name)
+        first = sheet_name not in self._columns
+        if first:
+            self._columns[sheet_name] = list(df.columns)
+        df.reindex(columns=self._columns[sheet_name]).to_csv(
+            path, mode='w' if first else 'a', header=first, index=False,
+            encoding='utf-8-sig' if first else 'utf-8')
+        self.rows_written += len(df)
+
+    def close(self):
+        pass
+
+
+class SqliteReportWriter:
+    """每张sheet一张SQLite表，逐块追加写入
+
+    打开时删除库中已有的各sheet表，重复运行不会累积旧行，本次没有数据的sheet也不会留下旧表。
+    """
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self._columns = {}
+        self.rows_written = 0
+        with self.connection:
+            for sheet_name in CONSOLIDATED_SHEETS:
+                self.connection.execute(f'DROP TABLE IF EXISTS "{sheet_name}"')
+
+    def write(self, sheet_name, df):
+        if_exists = 'append' if sheet_name in self._columns else 'replace'
+        columns = self._columns.setdefault(sheet_name, list(df.columns))
+        df.reindex(columns=columns).to_sql(sheet_name, self.connection, if_exists=if_exists, index=False)
+        self.rows_written += len(df)
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+REPORT_WRITERS = {
+    'xlsx': XlsxReportWriter,
+    'csv': CsvReportWriter,
+    'sqlite': SqliteReportWriter
+}
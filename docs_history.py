@@ -0,0 +1,431 @@
+"""SQLite历史库：按上传批次和来源文件保存提取结果，刷新页面或重启服务后可直接载入，无需重新解析"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from docs_store import DATA_KEYS, ResultStore, compact_frame, normalize_keys
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch_id INTEGER NOT NULL REFERENCES batches (batch_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    data_key TEXT NOT NULL,
+    combined INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    columns TEXT NOT NULL,
+    dtypes TEXT NOT NULL,
+    UNIQUE (batch_id, file_name)
+);
+CREATE INDEX IF NOT EXISTS files_batch ON files (batch_id, data_key, position);
+"""
+
+
+class StoredFile(NamedTuple):
+    """历史库中的一个来源文件（分区元数据，行数据在rows_<data_key>表中）"""
+    file_id: int
+    file_type: str
+    data_key: str
+    combined: bool
+    file_name: str
+    position: int
+    row_count: int
+    columns: list
+    dtypes: dict
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+# 单元格类型码：SQLite只区分整数 / 实数 / 文本 / NULL，每行另存各列的类型码，读回时还原原始类型
+CELL_STR, CELL_INT, CELL_BIG_INT, CELL_FLOAT, CELL_BOOL = 's', 'i', 'I', 'f', 'b'
+CELL_TIMESTAMP, CELL_DATETIME, CELL_DATE, CELL_TIME = 'p', 'd', 'D', 't'
+CELL_NAN, CELL_NONE, CELL_NA, CELL_NAT, CELL_TEXT = 'n', '0', 'a', 'x', 'o'
+
+_CELL_READERS = {
+    CELL_STR: str,
+    CELL_INT: int,
+    CELL_BIG_INT: int,
+    CELL_FLOAT: float,
+    CELL_BOOL: bool,
+    CELL_TIMESTAMP: pd.Timestamp,
+    CELL_DATETIME: datetime.fromisoformat,
+    CELL_DATE: date.fromisoformat,
+    CELL_TIME: time.fromisoformat,
+    CELL_NAN: lambda value: np.nan,
+    CELL_NONE: lambda value: None,
+    CELL_NA: lambda value: pd.NA,
+    CELL_NAT: lambda value: pd.NaT,
+    CELL_TEXT: str,
+}
+
+
+def _sql_value(value):
+    """写入SQLite的 (值, 类型码)：int / float / str原样保存，布尔存为整数，日期时间存为ISO文本，
+    各种空值存为NULL；无法还原的其他类型按文本保存"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None:
+        return None, CELL_NONE
+    if value is pd.NA:
+        return None, CELL_NA
+    if value is pd.NaT:
+        return None, CELL_NAT
+    if isinstance(value, bool):
+        return int(value), CELL_BOOL
+    if isinstance(value, int):
+        # 超出SQLite整数范围的按文本保存
+        return (value, CELL_INT) if -2 ** 63 <= value < 2 ** 63 else (str(value), CELL_BIG_INT)
+    if isinstance(value, float):
+        return (None, CELL_NAN) if value != value else (value, CELL_FLOAT)
+    if isinstance(value, str):
+        return value, CELL_STR
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat(), CELL_TIMESTAMP
+    if isinstance(value, datetime):
+        return value.isoformat(), CELL_DATETIME
+    if isinstance(value, date):
+        return value.isoformat(), CELL_DATE
+    if isinstance(value, time):
+        return value.isoformat(), CELL_TIME
+    return str(value), CELL_TEXT
+
+
+def _cell_value(value, code):
+    """按类型码还原单元格；没有类型码时NULL读为NaN"""
+    if code is None:
+        return np.nan if value is None else value
+    return _CELL_READERS[code](value)
+
+
+def _like(term):
+    escaped = str(term).strip().upper().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+class HistoryDB:
+    """历史库连接（进程内共享，线程安全）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._columns = {}
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA foreign_keys=ON")
+            self.connection.executescript(SCHEMA)
+            for data_key in DATA_KEYS:
+                self.connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS rows_{data_key} ("
+                    f"file_id INTEGER NOT NULL, row_no INTEGER NOT NULL, sn_key TEXT, cell_types TEXT, "
+                    f"PRIMARY KEY (file_id, row_no))"
+                )
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS rows_{data_key}_sn ON rows_{data_key} (sn_key)")
+                # 早期的库没有类型码列，其中的行读回时NULL按NaN处理
+                info = self.connection.execute(f"PRAGMA table_info(rows_{data_key})").fetchall()
+                if 'cell_types' not in [row[1] for row in info]:
+                    self.connection.execute(f"ALTER TABLE rows_{data_key} ADD COLUMN cell_types TEXT")
+            self.connection.commit()
+
+    # ================== 批次 ==================
+    def create_batch(self):
+        with self._lock:
+            cursor = self.connection.execute("INSERT INTO batches (created_at) VALUES (?)",
+                                             (datetime.now().strftime('%Y-%m-%d %H:%M:%S'),))
+            self.connection.commit()
+            return cursor.lastrowid
+
+    def batches(self):
+        """全部批次（新的在前）及其文件数和行数"""
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT b.batch_id, b.created_at, COUNT(f.file_id), COALESCE(SUM(f.row_count), 0) "
+                "FROM batches b LEFT JOIN files f ON f.batch_id = b.batch_id "
+                "GROUP BY b.batch_id ORDER BY b.batch_id DESC"
+            ).fetchall()
+        return [{'batch_id': batch_id, 'created_at': created_at, 'files': files, 'rows': n_rows}
+                for batch_id, created_at, files, n_rows in rows]
+
+    # ================== 文件分区 ==================
+    def files(self, batch_id):
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT file_id, file_type, data_key, combined, file_name, position, row_count, columns, dtypes "
+                "FROM files WHERE batch_id = ? ORDER BY position", (batch_id,)
+            ).fetchall()
+        return [StoredFile(file_id, file_type, data_key, bool(combined), file_name, position, row_count,
+                           json.loads(columns), json.loads(dtypes))
+                for file_id, file_type, data_key, combined, file_name, position, row_count, columns, dtypes in rows]
+
+    def table_columns(self, data_key):
+        """rows_<data_key>表中的数据列"""
+        with self._lock:
+            if data_key not in self._columns:
+                info = self.connection.execute(f"PRAGMA table_info(rows_{data_key})").fetchall()
+                self._columns[data_key] = [row[1] for row in info
+                                           if row[1] not in ('file_id', 'row_no', 'sn_key', 'cell_types')]
+            return self._columns[data_key]
+
+    def _ensure_columns(self, data_key, columns):
+        existing = self.table_columns(data_key)
+        for column in columns:
+            if column not in existing:
+                self.connection.execute(f"ALTER TABLE rows_{data_key} ADD COLUMN {_quote(column)}")
+                if 'CD Code' in str(column):
+                    index_name = _quote(f"rows_{data_key}_{column}")
+                    self.connection.execute(f"CREATE INDEX IF NOT EXISTS {index_name} "
+                                            f"ON rows_{data_key} ({_quote(column)})")
+                existing.append(column)
+
+    def write_file(self, batch_id, file_type, data_key, file_name, data):
+        """写入一个文件的行；同一批次中同名文件已存在时原位替换"""
+        columns = [str(column) for column in data.columns]
+        dtypes = {str(column): str(dtype) for column, dtype in data.dtypes.items()}
+        combined = '二合一' in file_name
+        sn_keys = normalize_keys(data['S/N#']).tolist() if 'S/N#' in data.columns else [None] * len(data)
+        cells = [[_sql_value(value) for value in data[column].tolist()] for column in data.columns]
+        values = [[value for value, _ in column] for column in cells]
+        cell_types = [''.join(codes) for codes in zip(*([code for _, code in column] for column in cells))]
+
+        with self._lock:
+            old = self.connection.execute("SELECT file_id, data_key, position FROM files "
+                                          "WHERE batch_id = ? AND file_name = ?", (batch_id, file_name)).fetchone()
+            if old is not None:
+                self._delete_file(old[0], old[1])
+                position = old[2]
+            else:
+                position = self.connection.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM files "
+                                                   "WHERE batch_id = ?", (batch_id,)).fetchone()[0]
+            cursor = self.connection.execute(
+                "INSERT INTO files (batch_id, position, file_name, file_type, data_key, combined, row_count, "
+                "columns, dtypes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (batch_id, position, file_name, file_type, data_key, int(combined), len(data),
+                 json.dumps(columns, ensure_ascii=False), json.dumps(dtypes, ensure_ascii=False))
+            )
+            file_id = cursor.lastrowid
+            self._ensure_columns(data_key, columns)
+            placeholders = ', '.join('?' * (len(columns) + 4))
+            self.connection.executemany(
+                f"INSERT INTO rows_{data_key} (file_id, row_no, sn_key, cell_types, "
+                f"{', '.join(map(_quote, columns))}) VALUES ({placeholders})",
+                ((file_id, row_no, sn_key, codes, *row)
+                 for row_no, (sn_key, codes, *row) in enumerate(zip(sn_keys, cell_types, *values)))
+            )
+            self.connection.commit()
+        return StoredFile(file_id, file_type, data_key, combined, file_name, position, len(data), columns, dtypes)
+
+    def _delete_file(self, file_id, data_key):
+        self.connection.execute(f"DELETE FROM rows_{data_key} WHERE file_id = ?", (file_id,))
+        self.connection.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+
+    def delete_file(self, stored):
+        with self._lock:
+            self._delete_file(stored.file_id, stored.data_key)
+            self.connection.commit()
+
+    def read_file(self, stored):
+        """读回一个文件的行，列顺序、dtype和单元格类型与写入时相同"""
+        with self._lock:
+            rows = self.connection.execute(
+                f"SELECT cell_types, {', '.join(map(_quote, stored.columns))} FROM rows_{stored.data_key} "
+                f"WHERE file_id = ? ORDER BY row_no", (stored.file_id,)
+            ).fetchall()
+        rows = [[_cell_value(value, code) for value, code in zip(values, codes or [None] * len(values))]
+                for codes, *values in rows]
+        columns = list(zip(*rows)) if rows else [()] * len(stored.columns)
+        data = {}
+        for column, values in zip(stored.columns, columns):
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+            data[column] = pd.Series(array, dtype=object).astype(stored.dtypes[column])
+        return pd.DataFrame(data, columns=stored.columns)
+
+    def size(self):
+        """库文件大小（含WAL日志）"""
+        return sum(os.path.getsize(path) for path in (self.path, f"{self.path}-wal") if os.path.exists(path))
+
+
+class SqlIndex:
+    """历史库中的预览查询：筛选和分页都在SQLite中完成，只读取当前页的行
+
+    接口与FrameIndex相同（len / search / page），筛选同样不区分大小写、按包含关系匹配。
+    """
+
+    def __init__(self, db, batch_id, data_key, columns):
+        self.db = db
+        self.batch_id = batch_id
+        self.data_key = data_key
+        self.columns = columns
+        self._from = f"FROM rows_{data_key} r JOIN files f ON f.file_id = r.file_id WHERE f.batch_id = ?"
+        self._file_columns = {}
+
+    def __len__(self):
+        with self.db._lock:
+            return self.db.connection.execute(f"SELECT COUNT(*) {self._from}", (self.batch_id,)).fetchone()[0]
+
+    def _condition(self, field):
+        if field == 'S/N#':
+            return "r.sn_key LIKE ? ESCAPE '\\'", 1
+        if field == 'CD Code':
+            columns = [col for col in self.db.table_columns(self.data_key) if 'CD Code' in col]
+        else:
+            columns = [field] if field in self.db.table_columns(self.data_key) else []
+        if not columns:
+            return "0", 0
+        return ' OR '.join(f"UPPER(TRIM(CAST(r.{_quote(col)} AS TEXT))) LIKE ? ESCAPE '\\'" for col in columns), \
+            len(columns)
+
+    def search(self, filters):
+        """按 {字段: 关键字} 同时筛选，返回按上传顺序排列的行ID；没有条件时返回None表示全部行"""
+        conditions, params = [], [self.batch_id]
+        for field, term in filters.items():
+            if term is None or not str(term).strip():
+                continue
+            condition, n_params = self._condition(field)
+            conditions.append(f"({condition})")
+            params.extend([_like(term)] * n_params)
+        if not conditions:
+            return None
+        with self.db._lock:
+            rows = self.db.connection.execute(
+                f"SELECT r.rowid {self._from} AND {' AND '.join(conditions)} ORDER BY f.position, r.row_no", params
+            ).fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    def _decode(self, file_columns, cell_types, *values):
+        """按该行所属文件的列顺序取类型码，还原各列的原始类型；文件中没有的列为None"""
+        if cell_types is None:
+            return list(values)
+        if file_columns not in self._file_columns:
+            self._file_columns[file_columns] = json.loads(file_columns)
+        codes = dict(zip(self._file_columns[file_columns], cell_types))
+        return [_cell_value(value, codes[column]) if column in codes else None
+                for column, value in zip(self.columns, values)]
+
+    def page(self, rows, page, page_size):
+        """取第page页（从1开始）的数据；rows为None时按全部行分页"""
+        start = (page - 1) * page_size
+        select = (f"SELECT r.rowid, f.columns, r.cell_types, {', '.join('r.' + _quote(col) for col in self.columns)} "
+                  f"{self._from}")
+        with self.db._lock:
+            if rows is None:
+                fetched = self.db.connection.execute(f"{select} ORDER BY f.position, r.row_no LIMIT ? OFFSET ?",
+                                                     (self.batch_id, page_size, start)).fetchall()
+            else:
+                ids = rows[start:start + page_size].tolist()
+                fetched = self.db.connection.execute(
+                    f"{select} AND r.rowid IN ({', '.join('?' * len(ids))})", (self.batch_id, *ids)
+                ).fetchall() if ids else []
+                order = {row_id: i for i, row_id in enumerate(ids)}
+                fetched.sort(key=lambda row: order[row[0]])
+        data = pd.DataFrame([self._decode(*row[1:]) for row in fetched], columns=self.columns)
+        data.index = pd.RangeIndex(start, start + len(data))
+        return data
+
+
+class SqliteResultStore(ResultStore):
+    """接口与ResultStore相同，但行数据保存在历史库的一个批次中，内存里只保留文件元数据"""
+
+    def __init__(self, db, batch_id):
+        super().__init__()
+        self.db = db
+        self.batch_id = batch_id
+        for stored in db.files(batch_id):
+            self._partitions[stored.file_name] = stored
+            self._versions[stored.data_key] = 1
+
+    @classmethod
+    def create(cls, db, source=None):
+        """新建批次；传入已有的ResultStore时把其中的文件一并写入"""
+        store = cls(db, db.create_batch())
+        if source is not None:
+            for file_name, file_type, data_key, data in source.items():
+                store.add(file_type, data_key, file_name, data)
+        return store
+
+    def add(self, file_type, data_key, file_name, data):
+        """写入历史库；同名文件已存在时原位替换"""
+        old = self._partitions.get(file_name)
+        if old is not None:
+            self._versions[old.data_key] += 1
+        self._partitions[file_name] = self.db.write_file(self.batch_id, file_type, data_key, file_name, data)
+        self._versions[data_key] += 1
+
+    def remove(self, file_name):
+        old = self._partitions.pop(file_name, None)
+        if old is None:
+            return False
+        self.db.delete_file(old)
+        self._versions[old.data_key] += 1
+        return True
+
+    def items(self):
+        for file_name, stored in self._partitions.items():
+            yield file_name, stored.file_type, stored.data_key, self.db.read_file(stored)
+
+    def _mask(self, parts, combined):
+        return np.repeat([part.combined == combined for part in parts], [part.row_count for part in parts])
+
+    def export_frame(self, data_key, combined=None):
+        parts = [part for part in self._partitions.values() if part.data_key == data_key]
+        if not parts:
+            return None
+        data = pd.concat([self.db.read_file(part) for part in parts], ignore_index=True)
+        return data if combined is None else data[self._mask(parts, combined)]
+
+    def frame(self, data_key, combined=None):
+        """从历史库读出的紧凑合并表（对账等需要整表时使用），每个数据版本只读取一次"""
+        cache_key = (data_key, combined)
+        cached = self._frames.get(cache_key)
+        if cached is not None and cached[0] == self._versions[data_key]:
+            return cached[1]
+        parts = [part for part in self._partitions.values() if part.data_key == data_key]
+        if not parts:
+            data = None
+        elif combined is None:
+            data = compact_frame(self.export_frame(data_key))[0]
+        else:
+            data = self.frame(data_key)[self._mask(parts, combined)]
+        self._frames[cache_key] = (self._versions[data_key], data)
+        return data
+
+    def index(self, data_key):
+        """预览查询直接在历史库中执行，不需要读出整表"""
+        cached = self._indexes.get(data_key)
+        if cached is not None and cached[0] == self._versions[data_key]:
+            return cached[1]
+        parts = [part for part in self._partitions.values() if part.data_key == data_key]
+        columns = list(dict.fromkeys(column for part in parts for column in part.columns))
+        index = SqlIndex(self.db, self.batch_id, data_key, columns) if parts else None
+        self._indexes[data_key] = (self._versions[data_key], index)
+        return index
+
+    def memory_usage(self):
+        frames = {id(data): data for _, data in self._frames.values() if data is not None}
+        frames = sum(int(data.memory_usage(deep=True).sum()) for data in frames.values())
+        return {'partitions': 0, 'frames': frames, 'indexes': 0, 'total': frames, 'raw': 0,
+                'database': self.db.size()}
+
+
+def history_path():
+    """历史库路径：ANMAO_HISTORY_DB，默认为当前目录下的anmao_history.sqlite"""
+    return os.environ.get('ANMAO_HISTORY_DB') or 'anmao_history.sqlite'
+
+
+def history_from_env():
+    """打开历史库（不存在时新建）"""
+    return HistoryDB(history_path())
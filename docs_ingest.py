@@ -0,0 +1,162 @@
+"""后台解析：每个会话一个解析线程，页面重跑时只取走已完成的结果，不会重复触发或中断解析"""
+import threading
+import zipfile
+from collections import deque
+from itertools import count
+
+from docs_processing import classify_file, iter_uploads, process_files, upload_names
+
+# 文件状态
+WAITING = '⏳ 等待中'
+RUNNING = '🔄 解析中'
+DONE = '✅ 完成'
+EMPTY = '⚠️ 无有效数据'
+DUPLICATE = '⏩ 重复跳过'
+UNKNOWN = '❌ 无法识别'
+FAILED = '❌ 失败'
+FINISHED = (DONE, EMPTY, DUPLICATE, UNKNOWN, FAILED)
+
+
+class IngestWorker:
+    """会话级后台解析线程
+
+    submit() 把一批上传文件排入队列，线程按提交顺序逐批解析；
+    每个文件的FileResult解析完成后放入待取队列，由页面在脚本线程中用drain()取走并写入ResultStore。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batches = deque()
+        self._results = deque()
+        self._thread = None
+        self._submitted = set()
+        self._seen_names = set()
+        self.files = []  # [文件名, 状态]，与上传顺序一致
+        self.errors = []  # 无法读取的压缩包、整批无法继续处理时的错误信息
+
+    def pending_uploads(self, uploaded_files):
+        """尚未提交过的上传文件（按file_id判断，页面重跑不会重复提交）"""
+        return [file for file in uploaded_files if getattr(file, 'file_id', file.name) not in self._submitted]
+
+    def submit(self, uploaded_files, known_names=(), max_workers=1, cache=None, layouts=None, scheduler=None):
+        """提交一批上传文件；known_names为会话中已有结果的文件名，用于识别重复上传
+
+        传入scheduler（ParseScheduler）时与其他会话共用服务器级的解析名额，本会话为调度器中的一个会话。
+        """
+        readable, names = [], []
+        with self._lock:
+            self._submitted.update(getattr(file, 'file_id', file.name) for file in uploaded_files)
+        for file in uploaded_files:
+            try:
+                names.extend(upload_names([file]))
+                readable.append(file)
+            except zipfile.BadZipFile:
+                self.errors.append(f"❌ 无法读取压缩包：{file.name}")
+        if not readable:
+            return
+        with self._lock:
+            self._seen_names.update(known_names)
+            offset = len(self.files)
+            self.files.extend([name, WAITING] for name in names)
+            self._batches.append((readable, offset, len(names), max_workers, cache, layouts, scheduler))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="anmao-ingest", daemon=True)
+                self._thread.start()
+
+    def reset_seen(self, known_names):
+        """会话的结果存储被替换（载入历史批次、切换存储）后，重复上传改按新存储中的文件名判断
+
+        正在解析的文件和已完成但尚未被页面取走的结果仍占用文件名。
+        """
+        with self._lock:
+            seen = set(known_names)
+            seen.update(name for name, status in self.files if status == RUNNING)
+            seen.update(result.file_name for result, duplicate in self._results
+                        if not duplicate and result.file_type and not result.error
+                        and result.data is not None and not result.data.empty)
+            self._seen_names = seen
+
+    @property
+    def busy(self):
+        """仍有文件在解析，或有结果尚未被页面取走"""
+        with self._lock:
+            return (bool(self._batches) or bool(self._results)
+                    or any(status not in FINISHED for _, status in self.files))
+
+    def progress(self):
+        """(已完成文件数, 文件总数)"""
+        with self._lock:
+            return sum(status in FINISHED for _, status in self.files), len(self.files)
+
+    def statuses(self):
+        with self._lock:
+            return [tuple(entry) for entry in self.files]
+
+    def drain(self):
+        """取走线程已完成、页面尚未处理的 (FileResult, 是否重复文件)"""
+        with self._lock:
+            results = list(self._results)
+            self._results.clear()
+        return results
+
+    # ================== 解析线程 ==================
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._batches:
+                    return
+                uploaded_files, offset, size, max_workers, cache, layouts, scheduler = self._batches[0]
+            try:
+                self._run_batch(uploaded_files, offset, max_workers, cache, layouts, scheduler)
+            except Exception as e:
+                # 压缩包损坏等无法继续展开的情况：本批剩余文件标记为失败，继续处理下一批
+                with self._lock:
+                    for entry in self.files[offset:offset + size]:
+                        if entry[1] not in FINISHED:
+                            entry[1] = FAILED
+                            self._seen_names.discard(entry[0])
+                    self.errors.append(f"❌ 处理文件时发生严重错误：{str(e)}")
+            finally:
+                with self._lock:
+                    self._batches.popleft()
+
+    def _run_batch(self, uploaded_files, offset, max_workers, cache, layouts, scheduler):
+        positions = deque()
+        index = count(offset)
+
+        def jobs():
+            # 与原同步流程一致：会话中已有或本批重复的文件名不再解析；
+            # 解析失败或无有效数据的文件名在出结果后释放，修正后同名重新上传仍会解析
+            for file in iter_uploads(uploaded_files):
+                i = next(index)
+                with self._lock:
+                    duplicate = file.name in self._seen_names
+                    file_type = None if duplicate else classify_file(file.name)
+                    if file_type:
+                        self._seen_names.add(file.name)
+                    self.files[i][1] = RUNNING
+                positions.append((i, duplicate, file.name if file_type else None))
+                yield file_type, file
+
+        try:
+            for result in process_files(jobs(), max_workers=max_workers, cache=cache, layouts=layouts,
+                                        scheduler=scheduler, session=self):
+                i, duplicate, claimed = positions.popleft()
+                if result.file_type is None:
+                    status = DUPLICATE if duplicate else UNKNOWN
+                elif result.error:
+                    status = FAILED
+                elif result.data is None or result.data.empty:
+                    status = EMPTY
+                else:
+                    status = DONE
+                with self._lock:
+                    self.files[i][1] = status
+                    if claimed and status != DONE:
+                        self._seen_names.discard(claimed)
+                    self._results.append((result, duplicate))
+        except Exception:
+            # 整批中断时，已占用但尚未出结果的文件名同样释放
+            with self._lock:
+                self._seen_names.difference_update(claimed for _, _, claimed in positions if claimed)
+            raise
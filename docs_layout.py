@@ -0,0 +1,120 @@
+"""版式识别：对Relocation的列标题行做指纹，记录每种版式实际命中的抓取模式，新版式和模式变化提示用户核对
+
+MC和Stock只有一种提取方式，不做版式识别。Relocation的抓取模式由数据区的位置决定，
+四种模式按顺序依次尝试的代价很低（每个文件约2ms），因此始终按原顺序确定模式，指纹只用于提示。
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+
+# Relocation数据区（第33行起）之上的列标题行（0起始）；表头其余区域含供应商名称、日期等逐文件不同的文字，不计入
+REL_TITLE_ROWS = (30, 31)
+
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _label(value):
+    """列标题文字的规范形式；数字、日期等取值单元格不计入指纹"""
+    if not isinstance(value, str):
+        return None
+    text = _SPACE_RE.sub(' ', value).strip().upper()
+    return text or None
+
+
+def fingerprint(df):
+    """Relocation列标题行的指纹：标题文字及其所在行列，只读取两行，同一供应商模板的文件指纹相同"""
+    n, width = df.shape
+    parts = ['REL']
+    for row in REL_TITLE_ROWS:
+        if row >= n:
+            break
+        for col in range(width):
+            label = _label(df.iat[row, col])
+            if label is not None:
+                parts.append(f"{row},{col}:{label}")
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+class LayoutRegistry:
+    """Relocation版式指纹 → 实际命中的抓取模式（REL1~REL4）（进程内共享，线程安全）
+
+    指定path时以JSON文件持久化，重启后已识别的版式不再提示；只有新版式和模式变化时才重写文件，
+    写文件在记录锁之外进行，不阻塞其他会话记录结果。
+    """
+
+    # 指纹算法变化时递增，旧文件中的记录不再适用
+    FORMAT_VERSION = 2
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._layouts = {}
+        self._revision = 0
+        self._saved_revision = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as fh:
+                    saved = json.load(fh)
+                if saved.get('version') == self.FORMAT_VERSION:
+                    self._layouts = saved['layouts']
+            except (OSError, ValueError, AttributeError, KeyError):
+                self._layouts = {}
+
+    def record(self, fingerprint, plan, file_name):
+        """记录一次识别结果，返回该指纹之前记录的抓取模式（新版式返回None）
+
+        已知指纹的模式发生变化时以新模式为准，并累计变化次数，由调用方提示核对。
+        """
+        snapshot = None
+        with self._lock:
+            entry = self._layouts.get(fingerprint)
+            if entry is None:
+                entry = self._layouts[fingerprint] = {'plan': plan, 'first_file': file_name, 'files': 0}
+                previous = None
+            else:
+                previous = entry['plan']
+            entry['files'] += 1
+            if previous != plan:
+                if previous is not None:
+                    entry['changes'] = entry.get('changes', 0) + 1
+                entry['plan'] = plan
+                self._revision += 1
+                snapshot = (self._revision, json.dumps({'version': self.FORMAT_VERSION, 'layouts': self._layouts},
+                                                       ensure_ascii=False, indent=2))
+        if snapshot is not None:
+            self._save(*snapshot)
+        return previous
+
+    def entries(self):
+        with self._lock:
+            return [{'指纹': key, '抓取模式': entry['plan'], '首个文件': entry['first_file'], '文件数': entry['files'],
+                     '模式变化': entry.get('changes', 0)}
+                    for key, entry in self._layouts.items()]
+
+    def _save(self, revision, text):
+        if not self.path:
+            return
+        with self._save_lock:
+            # 并发记录时只写最新的快照
+            if revision <= self._saved_revision:
+                return
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as fh:
+                    fh.write(text)
+                os.replace(tmp_path, self.path)
+                self._saved_revision = revision
+            except OSError:
+                pass
+
+
+def layouts_from_env():
+    """设置了ANMAO_CACHE_DIR时把版式记录保存在缓存目录的layouts.json中"""
+    cache_dir = os.environ.get('ANMAO_CACHE_DIR')
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        return LayoutRegistry(os.path.join(cache_dir, 'layouts.json'))
+    return LayoutRegistry()
@@ -0,0 +1,448 @@
+"""安贸审核资料解析核心：文件分类与MC / Relocation / Stock提取（不依赖Streamlit，可在子进程中执行）"""
+import re
+import struct
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from docs_cache import cache_key
+from docs_layout import fingerprint
+from docs_reader import read_template, reader_identity, template_key
+from docs_timing import timed
+
+
+class FileProcessingError(Exception):
+    """单个文件解析失败，异常消息即为展示给用户的提示"""
+
+
+class FileResult(NamedTuple):
+    """单个文件的处理结果"""
+    file_type: str
+    file_name: str
+    data: Optional[pd.DataFrame]
+    error: Optional[str] = None
+    fatal: bool = False
+    timings: Optional[dict] = None
+    layout: Optional[dict] = None
+
+
+# ================== 文件类型识别 ==================
+FILE_PROCESSORS = {
+    'MC': {
+        'pattern': re.compile(r'MC Info', re.IGNORECASE),
+        'data_key': 'mc_data'
+    },
+    'REL': {
+        'pattern': re.compile(r'relocation', re.IGNORECASE),
+        'data_key': 'rel_data'
+    },
+    'STOCK': {
+        'pattern': re.compile(r'(Stock Machine|二合一)', re.IGNORECASE),
+        'data_key': 'stock_data'
+    }
+}
+
+
+def classify_file(file_name):
+    """按文件名识别文件类型，无法识别时返回None"""
+    for ft, config in FILE_PROCESSORS.items():
+        if config['pattern'].search(file_name):
+            return ft
+    return None
+
+
+# ================== 向量化提取引擎 ==================
+# Relocation四种抓取模式对应的提取方案名
+REL_PLANS = ('REL1', 'REL2', 'REL3', 'REL4')
+
+def _column_values(df, col, default):
+    """整列取为NumPy数组（只切片一次）；列不存在时返回原逻辑使用的默认值"""
+    return df.iloc[:, col].to_numpy() if df.shape[1] > col else default
+
+def _notna(values, n):
+    """逐行的pd.notna结果；values为标量默认值时整列相同"""
+    if isinstance(values, np.ndarray):
+        return pd.notna(values)
+    return np.full(n, pd.notna(values))
+
+def _blank(df, cols):
+    """指定列同时为空的行掩码；任一列不存在时全部为False（与原逻辑的列数判断一致）"""
+    if df.shape[1] <= max(cols):
+        return np.zeros(len(df), dtype=bool)
+    return np.logical_and.reduce([pd.isna(df.iloc[:, col].to_numpy()) for col in cols])
+
+def _stop_row(stop_mask, start, end):
+    """[start, end) 内第一个满足停止条件的行号，没有则返回end"""
+    if start >= end:
+        return end
+    hits = np.flatnonzero(stop_mask[start:end])
+    return start + int(hits[0]) if hits.size else end
+
+def _take(values, rows):
+    """按行号取值；values为标量默认值时按行数重复"""
+    if isinstance(values, np.ndarray):
+        return list(values[rows])
+    return [values] * len(rows)
+
+def _frame(columns):
+    """按列组装结果；没有数据时与原逻辑一样返回空DataFrame"""
+    if not any(len(values) for values in columns.values()):
+        return pd.DataFrame()
+    return pd.DataFrame(columns)
+
+def extract_mc_rows(df, file_name):
+    """MC Info：D11为CD Code，第21~100行中A~D列不全为空的行取C、D列"""
+    n, width = df.shape
+    cd_code = df.iloc[10, 3] if n > 10 else ''
+
+    rows = np.arange(20, min(n, 100))
+    if rows.size:
+        blank = np.logical_and.reduce([pd.isna(df.iloc[:, col].to_numpy()) for col in range(min(width, 4))])
+        if width < 4 and blank[rows].any():
+            # 原逻辑会在第一条全空行上访问不存在的列，保持同样的报错
+            df.iloc[rows[blank[rows]][0], width]
+        rows = rows[~blank[rows]]
+
+    return _frame({
+        "CD Code": [cd_code] * len(rows),
+        "Machine Type": _take(_column_values(df, 2, ''), rows),
+        "S/N#": _take(_column_values(df, 3, ''), rows),
+        "File_name": [file_name] * len(rows)
+    })
+
+def extract_rel_rows(df, file_name, layout=None):
+    """Relocation：一次切出B/E/G/H/I列，在同一组数组上依次评估四种抓取模式
+
+    layout不为None时写入实际命中的模式（REL1~REL4）。
+    """
+    n = len(df)
+    from_cd = df.iloc[24, 3] if n > 24 else ''
+    to_cd = df.iloc[26, 3] if n > 26 else ''
+
+    b_col = _column_values(df, 1, '')
+    e_col = _column_values(df, 4, '')
+    masks = {}
+
+    def mask(name):
+        # 各模式用到的行掩码按需计算，同一文件内只算一次
+        if name not in masks:
+            if name == 'either':
+                masks[name] = _notna(b_col, n) | _notna(e_col, n)
+            elif name == 'stop_gh':
+                masks[name] = _blank(df, (6, 7))
+            else:
+                masks[name] = _blank(df, (7, 8))
+        return masks[name]
+
+    def select(mode):
+        """模式命中时返回 (行号, Machine Type, S/N#)，否则返回None"""
+        if mode == 1:
+            # 模式1：原始抓取方式（第33行起，G列和H列同时为空停止，不过滤空行）
+            rows = np.arange(32, _stop_row(mask('stop_gh'), 32, min(n, 100)))
+            return (rows, _take(b_col, rows), _take(e_col, rows)) if rows.size else None
+        if mode == 2:
+            # 模式2：备用抓取方案（第34行起，H列和I列同时为空停止）
+            rows = np.arange(33, _stop_row(mask('stop_hi'), 33, min(n, 100)))
+            rows = rows[mask('either')[rows]]
+            return (rows, _take(b_col, rows), _take(e_col, rows)) if rows.size else None
+        if mode == 3:
+            # 模式3：终极抓取方案（B列、E列分别抓取后依次拼接）
+            candidates = np.arange(33, _stop_row(mask('stop_hi'), 33, min(n, 200)))
+            b_rows = candidates[_notna(_column_values(df, 1, None), n)[candidates]]
+            e_rows = candidates[_notna(_column_values(df, 4, None), n)[candidates]]
+            if not (b_rows.size or e_rows.size):
+                return None
+            return (np.concatenate([b_rows, e_rows]),
+                    _take(b_col, b_rows) + [""] * len(e_rows),
+                    [""] * len(b_rows) + _take(e_col, e_rows))
+        # 模式4：旧版处理逻辑（从第33行开始扫描到H列和I列同时为空）
+        rows = np.arange(32, _stop_row(mask('stop_hi'), 32, n))
+        rows = rows[mask('either')[rows]]
+        return rows, _take(b_col, rows), _take(e_col, rows)
+
+    for mode in range(1, 5):
+        selected = select(mode)
+        if selected is not None:
+            break
+    if layout is not None:
+        layout['plan'] = REL_PLANS[mode - 1]
+
+    rows, machine_types, sns = selected
+    return _frame({
+        "From_CD Code": [from_cd] * len(rows),
+        "To_CD Code": [to_cd] * len(rows),
+        "Machine Type": machine_types,
+        "S/N#": sns,
+        "File_name": [file_name] * len(rows)
+    })
+
+def extract_normal_stock_rows(df, file_name):
+    """普通Stock：C15括号内为CD Code，第21行起到I列和J列同时为空，取B、E列"""
+    n, width = df.shape
+    c15 = str(df.iloc[14, 2]) if n > 14 and width > 2 else ''
+    matches = re.findall(r'[（(]([^）)]+)[）)]', c15)
+    cd_code = matches[-1].strip() if matches else ''
+
+    rows = np.arange(0)
+    if width >= 10:
+        b_col = _column_values(df, 1, None)
+        e_col = _column_values(df, 4, None)
+        rows = np.arange(20, _stop_row(_blank(df, (8, 9)), 20, min(n, 100)))
+        rows = rows[(_notna(b_col, n) | _notna(e_col, n))[rows]]
+
+    return _frame({
+        "CD Code": [cd_code] * len(rows),
+        "Machine Type": _take(b_col, rows) if rows.size else [],
+        "S/N#": _take(e_col, rows) if rows.size else [],
+        "File_name": [file_name] * len(rows)
+    })
+
+def extract_combined_stock_rows(df, file_name):
+    """二合一Stock：D15 / D16为CD Code，第22行起到J列为空，取C、F列"""
+    n, width = df.shape
+    cd_end_user = df.iloc[14, 3] if n > 14 and width > 3 else ''
+    cd_distributor = df.iloc[15, 3] if n > 15 and width > 3 else ''
+
+    rows = np.arange(0)
+    if width >= 6 and n > 21:
+        if width < 10:
+            # 原逻辑会在第一行访问不存在的J列，保持同样的报错
+            df.iloc[21, 9]
+        c_col = _column_values(df, 2, None)
+        f_col = _column_values(df, 5, None)
+        rows = np.arange(21, _stop_row(_blank(df, (9,)), 21, min(n, 100)))
+        rows = rows[(_notna(c_col, n) | _notna(f_col, n))[rows]]
+
+    return _frame({
+        "CD Code_End User": [cd_end_user] * len(rows),
+        "CD Code_Distributor": [cd_distributor] * len(rows),
+        "Machine Type": _take(c_col, rows) if rows.size else [],
+        "S/N#": _take(f_col, rows) if rows.size else [],
+        "File_name": [file_name] * len(rows)
+    })
+
+# ================== 统一文件处理函数 ==================
+def process_mc_file(file, timings=None):
+    """处理MC Info文件（timings不为None时记录读取和提取耗时）"""
+    try:
+        with timed(timings, 'read'):
+            df = read_template(file, 'MC')
+        with timed(timings, 'extract'):
+            return extract_mc_rows(df, file.name)
+    except Exception as e:
+        raise FileProcessingError(f"❌ MC文件处理失败：{file.name} - {str(e)}") from e
+
+def process_rel_file(file, timings=None, layout=None):
+    """处理Relocation文件（四阶段抓取；layout不为None时记录列标题行指纹和命中的模式）"""
+    try:
+        with timed(timings, 'read'):
+            df = read_template(file, 'REL')
+        if layout is not None:
+            with timed(timings, 'layout'):
+                layout['fingerprint'] = fingerprint(df)
+        with timed(timings, 'extract'):
+            return extract_rel_rows(df, file.name, layout)
+    except Exception as e:
+        raise FileProcessingError(f"❌ Relocation文件处理失败：{file.name} - {str(e)}") from e
+
+def process_stock_file(file, timings=None):
+    """处理Stock Machine文件"""
+    try:
+        with timed(timings, 'read'):
+            df = read_template(file, 'STOCK')
+
+        with timed(timings, 'extract'):
+            if '二合一' in file.name:
+                return process_combined_stock(df, file)
+            return process_normal_stock(df, file)
+    except Exception as e:
+        raise FileProcessingError(f"❌ Stock文件处理失败：{file.name} - {str(e)}") from e
+
+def process_normal_stock(df, file):
+    """处理普通Stock文件"""
+    return extract_normal_stock_rows(df, file.name)
+
+def process_combined_stock(df, file):
+    """处理二合一Stock文件"""
+    return extract_combined_stock_rows(df, file.name)
+
+# ================== 批量执行 ==================
+def process_file(file_type, file):
+    """按文件类型调用对应处理函数，并把异常转换为FileResult
+
+    Relocation结果的layout记录本文件的列标题行指纹和实际命中的抓取模式。
+    """
+    processor = globals()[f'process_{file_type.lower()}_file']
+    timings = {}
+    layout = {}
+    try:
+        data = processor(file, timings, layout) if file_type == 'REL' else processor(file, timings)
+        return FileResult(file_type, file.name, data, timings=timings, layout=layout or None)
+    except FileProcessingError as e:
+        return FileResult(file_type, file.name, None, str(e), timings=timings)
+    except Exception as e:
+        return FileResult(file_type, file.name, None, f"❌ 处理文件时发生严重错误：{file.name} - {str(e)}",
+                          fatal=True, timings=timings)
+
+def _process_payload(payload):
+    """子进程入口：由文件名和字节内容重建文件对象后处理"""
+    file_type, file_name, content = payload
+    file = BytesIO(content)
+    file.name = file_name
+    return process_file(file_type, file)
+
+def process_files(jobs, max_workers=1, cache=None, layouts=None, scheduler=None, session=None):
+    """逐个处理 (file_type, file)，按传入顺序产出FileResult
+
+    jobs可以是惰性的迭代器（例如逐个读取的压缩包成员），任何时刻只有有限个文件的内容在内存中。
+    max_workers大于1时使用有界进程池并行解析，结果仍按上传顺序产出，保证输出稳定。
+    传入cache（ParseCache）时，内容相同的文件直接复用已提取的行，只解析未命中的文件。
+    传入layouts（LayoutRegistry）时把Relocation的版式和命中的抓取模式记入layouts，新版式的layout['new']为True；
+    已知版式的模式发生变化时layout['previous']为之前记录的模式。
+    传入scheduler（ParseScheduler）时不再自建进程池，未命中缓存的文件交给全服务器共享的调度器，
+    session为调度器中的会话标识，max_workers为该会话最多同时占用的解析名额。
+    file_type为None的项不做处理，原样产出data为None的FileResult。
+    """
+    window = max_workers * 2 if scheduler is not None else 0 if max_workers <= 1 else max_workers * 2
+    executor = None
+    pending = deque()
+    try:
+        for file_type, file in jobs:
+            key = None
+            timings = {}
+            if file_type is None:
+                pending.append((None, timings, FileResult(None, file.name, None)))
+            else:
+                cached = None
+                if cache is not None:
+                    with timed(timings, 'cache'):
+                        key = cache_key(template_key(file_type, file.name), file.getvalue(),
+                                        reader_identity(file.name))
+                        cached = cache.get(key, file.name)
+                if cached is not None:
+                    pending.append((None, timings, FileResult(file_type, file.name, cached)))
+                elif scheduler is not None:
+                    future = scheduler.submit(session, _process_payload, (file_type, file.name, file.getvalue()),
+                                              limit=max_workers)
+                    pending.append((key, timings, future))
+                elif window:
+                    if executor is None:
+                        executor = ProcessPoolExecutor(max_workers=max_workers)
+                    future = executor.submit(_process_payload, (file_type, file.name, file.getvalue()))
+                    pending.append((key, timings, future))
+                else:
+                    pending.append((key, timings, process_file(file_type, file)))
+
+            while len(pending) > window:
+                yield _finish(pending.popleft(), cache, layouts)
+        while pending:
+            yield _finish(pending.popleft(), cache, layouts)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        # 提前结束时撤回仍在调度器中排队的文件
+        for _, _, result in pending:
+            if isinstance(result, Future):
+                result.cancel()
+
+def _finish(entry, cache, layouts=None):
+    """取出结果（等待子进程完成），成功解析的结果写入缓存，记录版式，并合并缓存查询耗时"""
+    key, timings, result = entry
+    if isinstance(result, Future):
+        result = result.result()
+    if key is not None and result.error is None and result.data is not None:
+        cache.put(key, result.data)
+    if layouts is not None and result.layout:
+        previous = layouts.record(result.layout['fingerprint'], result.layout['plan'], result.file_name)
+        result.layout['new'] = previous is None
+        if previous not in (None, result.layout['plan']):
+            result.layout['previous'] = previous
+    return result._replace(timings={**timings, **(result.timings or {})})
+
+# ================== 压缩包展开 ==================
+EXCEL_EXTENSIONS = ('.xls', '.xlsx', '.xlsm')
+
+
+def _unicode_path(info, raw):
+    """Info-ZIP Unicode Path扩展字段（0x7075）中的UTF-8路径；字段缺失或与原文件名的CRC不符时返回None"""
+    extra = info.extra
+    while len(extra) >= 4:
+        header_id, size = struct.unpack('<HH', extra[:4])
+        data = extra[4:4 + size]
+        if header_id == 0x7075 and len(data) >= 5 and data[0] == 1:
+            if struct.unpack('<L', data[1:5])[0] != zlib.crc32(raw):
+                return None
+            try:
+                return data[5:].decode('utf-8')
+            except UnicodeDecodeError:
+                return None
+        extra = extra[4 + size:]
+    return None
+
+
+def _member_name(info):
+    """压缩包成员路径
+
+    未设置UTF-8标记（0x800）时依次尝试：Info-ZIP Unicode Path扩展字段、按UTF-8严格解码原始字节
+    （Info-ZIP / macOS压缩）、按GBK解码（Windows中文系统压缩），都不成立时保留cp437解码结果。
+    """
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        raw = info.orig_filename.encode('cp437')
+    except UnicodeEncodeError:
+        return info.filename
+    name = _unicode_path(info, raw)
+    if name is not None:
+        return name
+    for encoding in ('utf-8', 'gbk'):
+        try:
+            return raw.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return info.filename
+
+def _excel_members(archive):
+    """zip中的Excel成员 (info, 成员路径)，跳过目录、macOS元数据和Office临时文件"""
+    for info in archive.infolist():
+        name = _member_name(info)
+        base_name = name.rsplit('/', 1)[-1]
+        if (info.is_dir() or name.startswith('__MACOSX/') or base_name.startswith(('._', '~$'))
+                or not name.lower().endswith(EXCEL_EXTENSIONS)):
+            continue
+        yield info, name
+
+def iter_zip_members(file):
+    """逐个读取zip中的Excel成员，返回以成员路径命名的文件对象；非Excel成员直接跳过"""
+    with zipfile.ZipFile(file) as archive:
+        for info, name in _excel_members(archive):
+            with archive.open(info) as member:
+                content = BytesIO(member.read())
+            content.name = name
+            yield content
+
+def iter_uploads(files):
+    """展开上传列表：普通文件原样返回，zip压缩包逐个返回其中的Excel成员"""
+    for file in files:
+        if file.name.lower().endswith('.zip'):
+            yield from iter_zip_members(file)
+        else:
+            yield file
+
+def upload_names(files):
+    """与iter_uploads顺序一致的文件名列表，只读取zip目录，不解压成员"""
+    names = []
+    for file in files:
+        if file.name.lower().endswith('.zip'):
+            with zipfile.ZipFile(file) as archive:
+                names.extend(name for _, name in _excel_members(archive))
+            file.seek(0)
+        else:
+            names.append(file.name)
+    return names
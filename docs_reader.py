@@ -0,0 +1,390 @@
+"""按模板声明的单元格 / 区域读取Excel，只加载提取所需的行列
+
+读取结果与 ``pd.read_excel(file, header=None)`` 在声明窗口内逐格一致：
+单元格转换规则与pandas的openpyxl / xlrd引擎相同，最后仍交给pandas的TextParser做类型推断；
+取值列（value_columns）的类型推断还会计入窗口之外的内容，与整表读取相同。
+读取后端可插拔（见READER_BACKENDS），默认只用openpyxl / xlrd；其他后端需通过ANMAO_READER_BACKENDS启用，
+启用的后端读取失败时回退到openpyxl / xlrd。
+"""
+import math
+import os
+import re
+from datetime import date, datetime, time
+from importlib.util import find_spec
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+from pandas.io.parsers import TextParser
+
+
+class ReadSpec(NamedTuple):
+    """模板读取声明
+
+    cells / ranges 使用Excel的A1写法，决定读取窗口的行数和列数；
+    open_range 为不限结束行的区域（如 "A33:I"），会一直读到 stop_columns 同时为空的行为止。
+    value_columns 为取值会进入提取结果的列，其类型推断须与整表读取一致；其余列只用于判断是否为空，
+    是否为空不受类型推断影响。
+    """
+    cells: tuple = ()
+    ranges: tuple = ()
+    open_range: Optional[str] = None
+    stop_columns: tuple = ()
+    value_columns: tuple = ()
+
+
+# ================== 各模板读取声明 ==================
+TEMPLATE_SPECS = {
+    # D11 + A21:D100，取C、D列
+    'MC': ReadSpec(cells=('D11',), ranges=('A21:D100',), value_columns=('C', 'D')),
+    # D25 / D27 + 模式1~3的 A33:I200，模式4向下读到H列和I列同时为空，取B、D、E列
+    'REL': ReadSpec(cells=('D25', 'D27'), ranges=('A33:I200',), open_range='A33:I', stop_columns=('H', 'I'),
+                    value_columns=('B', 'D', 'E')),
+    # C15 + A21:J100，取B、C、E列
+    'STOCK': ReadSpec(cells=('C15',), ranges=('A21:J100',), value_columns=('B', 'C', 'E')),
+    # D15 / D16 + A22:J100，取C、D、F列
+    'STOCK_COMBINED': ReadSpec(cells=('D15', 'D16'), ranges=('A22:J100',), value_columns=('C', 'D', 'F')),
+}
+
+_CELL_RE = re.compile(r'^([A-Z]+)(\d*)$')
+
+
+def _parse_ref(ref):
+    """把 "D11" 转换为0起始的 (行, 列)，行号缺省时返回None"""
+    col_letters, row_digits = _CELL_RE.match(ref.upper()).groups()
+    col = 0
+    for letter in col_letters:
+        col = col * 26 + ord(letter) - ord('A') + 1
+    return (int(row_digits) - 1 if row_digits else None), col - 1
+
+
+def spec_window(spec):
+    """返回声明覆盖的 (行数, 列数) 窗口"""
+    refs = list(spec.cells)
+    for area in spec.ranges + ((spec.open_range,) if spec.open_range else ()):
+        refs.extend(area.split(':'))
+    bounds = [_parse_ref(ref) for ref in refs]
+    n_rows = max(row for row, _ in bounds if row is not None) + 1
+    n_cols = max(col for _, col in bounds) + 1
+    return n_rows, n_cols
+
+
+def template_key(file_type, file_name):
+    """按文件类型（Stock再按是否二合一）确定模板"""
+    if file_type == 'STOCK' and '二合一' in file_name:
+        return 'STOCK_COMBINED'
+    return file_type
+
+
+def template_spec(file_type, file_name):
+    """按文件类型选择读取声明"""
+    return TEMPLATE_SPECS[template_key(file_type, file_name)]
+
+
+# TextParser会转换为布尔值的文本
+_BOOL_STRINGS = frozenset(('True', 'TRUE', 'true', 'False', 'FALSE', 'false'))
+
+
+def _value_kind(value):
+    """单元格取值对pandas列类型推断的影响种类；'text'为普通文本，所在列必然推断为object"""
+    if _is_blank(value) or (isinstance(value, str) and value in STR_NA_VALUES):
+        return 'blank'
+    if isinstance(value, str):
+        if value in _BOOL_STRINGS:
+            return ('bool-text', value)
+        try:
+            float(value)
+        except ValueError:
+            return 'text'
+        return ('number-text', value)
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return ('int', value < 0) if -2 ** 63 <= value < 2 ** 63 else ('big-int', value)
+    return type(value).__name__
+
+
+class _WindowScanner:
+    """逐行累积窗口数据，并判断何时可以停止读取
+
+    pandas按整列推断类型：窗口之外同一列中的文本、空行等会改变窗口内取值的类型（如整数变为浮点数）。
+    窗口读满后继续扫描各取值列，按取值种类各保留一个代表值，生成DataFrame时与窗口内的取值一起推断；
+    各取值列都已含普通文本（必然为object，之后的取值不再影响）时才提前停止。
+    """
+
+    def __init__(self, spec, fixed_width=None):
+        self.n_rows, self.n_cols = spec_window(spec)
+        self.fixed_width = fixed_width
+        self.open_start = _parse_ref(spec.open_range.split(':')[0])[0] if spec.open_range else None
+        self.stop_cols = [_parse_ref(col)[1] for col in spec.stop_columns]
+        self.rows = []
+        self.width = 0
+        self.last_row_with_data = -1
+        self.stop_seen = False
+        self.value_cols = ([_parse_ref(col)[1] for col in spec.value_columns] if spec.value_columns
+                           else list(range(self.n_cols)))
+        # 只跟踪取值列：窗口内是否已有普通文本，以及窗口之后出现的 取值种类 → 代表值
+        self.has_text = dict.fromkeys(self.value_cols, False)
+        self.beyond = {col: {} for col in self.value_cols}
+        self.blank_pending = False
+
+    def add(self, values, has_more):
+        """加入一行已转换的值（已截断到窗口列数），has_more表示窗口右侧仍有内容"""
+        row = list(values)
+        if self.fixed_width is None:
+            # 与pandas的openpyxl引擎一致：裁剪行尾空值，并记录最后一个有内容的行
+            while row and row[-1] == "":
+                row.pop()
+            width = self.n_cols if has_more else len(row)
+        else:
+            width = self.fixed_width
+        self.width = max(self.width, width)
+        if self._window_full():
+            # 窗口已读满，之后的行用于确定pandas的列数和窗口各列的类型推断
+            self._add_beyond(row, width)
+            return
+        if width:
+            self.last_row_with_data = len(self.rows)
+        if (self.open_start is not None and len(self.rows) >= self.open_start
+                and all(col >= len(row) or _is_blank(row[col]) for col in self.stop_cols)):
+            self.stop_seen = True
+        for col in self.value_cols:
+            if col < len(row) and not self.has_text[col] and _value_kind(row[col]) == 'text':
+                self.has_text[col] = True
+        self.rows.append(row)
+
+    def _add_beyond(self, row, width):
+        if not width:
+            # 空行只有在其后还有内容时才会成为pandas的一行
+            self.blank_pending = True
+            return
+        # 窗口之后还有内容：窗口末尾的空行同样保留
+        self.last_row_with_data = len(self.rows) - 1
+        for col in self.value_cols:
+            if self.has_text[col]:
+                continue
+            kinds = self.beyond[col]
+            if self.blank_pending:
+                kinds.setdefault('blank', "")
+            value = row[col] if col < len(row) else ""
+            kind = _value_kind(value)
+            kinds.setdefault(kind, value)
+            if kind == 'text':
+                self.has_text[col] = True
+        self.blank_pending = False
+
+    def _window_full(self):
+        if len(self.rows) < self.n_rows:
+            return False
+        if self.open_start is None:
+            return True
+        # 只有当停止列已经存在（pandas的列数超过停止列）时，空行才会真正终止扫描
+        return self.stop_seen and self.width > max(self.stop_cols)
+
+    def done(self):
+        """窗口已读满，列数已达到窗口上限（更右侧的列不影响提取结果），
+        且窗口各列都已含普通文本（之后的行不再改变类型推断）"""
+        if not self._window_full():
+            return False
+        if self.fixed_width is not None:
+            return all(self.has_text[col] for col in self.value_cols if col < self.fixed_width)
+        return self.width >= self.n_cols and all(self.has_text.values())
+
+    def frame(self):
+        data = self.rows[: self.last_row_with_data + 1]
+        if not data:
+            return pd.DataFrame()
+        data = [row + [""] * (self.width - len(row)) for row in data]
+        df = TextParser(data, header=None, skip_blank_lines=False).read()
+        for col, kinds in self.beyond.items():
+            if kinds and col < df.shape[1]:
+                # 窗口内的取值加上窗口之后各种类的代表值一起推断，与整表读取时该列的类型一致
+                values = [[row[col]] for row in data] + [[value] for value in kinds.values()]
+                column = TextParser(values, header=None, skip_blank_lines=False).read()[0]
+                df[col] = column.iloc[:len(data)]
+        return df
+
+
+def _is_blank(value):
+    return value == "" or (isinstance(value, float) and math.isnan(value))
+
+
+# ================== 读取引擎 ==================
+def _read_xlsx(file, spec):
+    """openpyxl只读流式读取，到达窗口末尾即停止"""
+    from openpyxl import load_workbook
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    def convert(cell):
+        if cell.value is None:
+            return ""
+        elif cell.data_type == TYPE_ERROR:
+            return np.nan
+        elif cell.data_type == TYPE_NUMERIC:
+            val = int(cell.value)
+            if val == cell.value:
+                return val
+            return float(cell.value)
+        return cell.value
+
+    scanner = _WindowScanner(spec)
+    wb = load_workbook(file, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = wb.worksheets[0]
+        sheet.reset_dimensions()
+        for row in sheet.rows:
+            values = [convert(cell) for cell in row[:scanner.n_cols]]
+            has_more = any(cell.value is not None and cell.value != "" for cell in row[scanner.n_cols:])
+            scanner.add(values, has_more)
+            if scanner.done():
+                break
+    finally:
+        wb.close()
+    return scanner.frame()
+
+def _read_xls(file, spec):
+    """xlrd按需加载第一个工作表，只读取窗口内的行列"""
+    from xlrd import XL_CELL_BOOLEAN, XL_CELL_DATE, XL_CELL_ERROR, XL_CELL_NUMBER, open_workbook, xldate
+
+    book = open_workbook(file_contents=file.read(), on_demand=True)
+    try:
+        epoch1904 = book.datemode
+        sheet = book.sheet_by_index(0)
+
+        def convert(value, typ):
+            if typ == XL_CELL_DATE:
+                try:
+                    value = xldate.xldate_as_datetime(value, epoch1904)
+                except OverflowError:
+                    return value
+                year = value.timetuple()[0:3]
+                if (not epoch1904 and year == (1899, 12, 31)) or (epoch1904 and year == (1904, 1, 1)):
+                    value = time(value.hour, value.minute, value.second, value.microsecond)
+            elif typ == XL_CELL_ERROR:
+                value = np.nan
+            elif typ == XL_CELL_BOOLEAN:
+                value = bool(value)
+            elif typ == XL_CELL_NUMBER and math.isfinite(value):
+                val = int(value)
+                if val == value:
+                    value = val
+            return value
+
+        # xlrd的每一行都补齐到ncols，pandas也不裁剪行尾空值，因此列数固定
+        n_cols = min(sheet.ncols, spec_window(spec)[1])
+        scanner = _WindowScanner(spec, fixed_width=n_cols)
+        for i in range(sheet.nrows):
+            values = [convert(v, t) for v, t in zip(sheet.row_values(i, 0, n_cols), sheet.row_types(i, 0, n_cols))]
+            scanner.add(values, False)
+            if scanner.done():
+                break
+    finally:
+        book.release_resources()
+    return scanner.frame()
+
+def _read_calamine(file, spec):
+    """python-calamine（Rust实现）读取第一个工作表，单元格转换规则与openpyxl / xlrd引擎相同
+
+    注意：calamine把只含空白字符的单元格读为空，提取结果可能与内置引擎不同，因此只在显式启用时使用。
+    """
+    from python_calamine import CalamineWorkbook
+
+    def convert(value):
+        if isinstance(value, float):
+            if math.isfinite(value):
+                val = int(value)
+                if val == value:
+                    return val
+            return value
+        if type(value) is date:
+            # openpyxl / xlrd都把日期单元格读为datetime
+            return datetime(value.year, value.month, value.day)
+        return value
+
+    is_xls = file.name.endswith('.xls')
+    wb = CalamineWorkbook.from_filelike(file)
+    try:
+        sheet = wb.get_sheet_by_index(0)
+        n_cols = spec_window(spec)[1]
+        # .xls与xlrd一致：每一行补齐到工作表列数，列数固定
+        scanner = _WindowScanner(spec, fixed_width=min(sheet.end[1] + 1, n_cols) if is_xls and sheet.end else None)
+        # iter_rows从第1行开始，但列从已用区域的首列开始，左侧补齐空列
+        lead = [""] * sheet.start[1] if sheet.start else []
+        for row in sheet.iter_rows():
+            row = lead + row
+            values = [convert(value) for value in row[:n_cols]]
+            has_more = any(value != "" for value in row[n_cols:])
+            scanner.add(values, has_more)
+            if scanner.done():
+                break
+    finally:
+        wb.close()
+    return scanner.frame()
+
+
+# ================== 读取后端 ==================
+class ReaderBackend(NamedTuple):
+    """读取后端：read(file, spec)返回窗口内的DataFrame，module为需要安装的模块"""
+    extensions: tuple
+    read: Callable
+    module: str
+
+
+READER_BACKENDS = {
+    'calamine': ReaderBackend(('.xls', '.xlsx', '.xlsm'), _read_calamine, 'python_calamine'),
+    'openpyxl': ReaderBackend(('.xlsx', '.xlsm'), _read_xlsx, 'openpyxl'),
+    'xlrd': ReaderBackend(('.xls',), _read_xls, 'xlrd'),
+}
+# 默认的优先顺序，只含与pd.read_excel逐格一致的内置引擎；
+# 可用ANMAO_READER_BACKENDS以逗号分隔覆盖（如 "calamine"），各格式的内置引擎始终作为最后的回退
+DEFAULT_BACKEND_ORDER = ('openpyxl', 'xlrd')
+
+
+def _file_format(file_name):
+    # 与原先的引擎选择一致：只有 .xls 结尾的文件交给xlrd，其余按xlsx读取
+    return '.xls' if file_name.endswith('.xls') else '.xlsx'
+
+
+def builtin_backend(file_name):
+    """该格式原有的读取引擎"""
+    return 'xlrd' if _file_format(file_name) == '.xls' else 'openpyxl'
+
+
+def available_backends(file_name):
+    """已安装且支持该文件格式的后端（按READER_BACKENDS中的顺序）"""
+    file_format = _file_format(file_name)
+    return [name for name, backend in READER_BACKENDS.items()
+            if file_format in backend.extensions and find_spec(backend.module) is not None]
+
+
+def reader_backends(file_name):
+    """该文件依次尝试的后端：按优先顺序取已安装的后端，内置引擎排在最后"""
+    order = os.environ.get('ANMAO_READER_BACKENDS')
+    order = [name.strip() for name in order.split(',')] if order else DEFAULT_BACKEND_ORDER
+    available = available_backends(file_name)
+    names = [name for name in order if name in available]
+    builtin = builtin_backend(file_name)
+    return [name for name in names if name != builtin] + [builtin]
+
+
+def reader_identity(file_name):
+    """该文件使用的读取后端顺序，如 "calamine+openpyxl"，用于区分不同后端的解析缓存"""
+    return '+'.join(reader_backends(file_name))
+
+
+def read_template(file, file_type, backend=None):
+    """按模板声明读取文件第一个工作表，返回与 pd.read_excel(header=None) 在窗口内一致的DataFrame
+
+    backend为None时按 reader_backends() 的顺序尝试，某个后端读取失败时换下一个，
+    全部失败时抛出内置引擎的异常；指定backend时只使用该后端。
+    """
+    spec = template_spec(file_type, file.name)
+    names = [backend] if backend else reader_backends(file.name)
+    for i, name in enumerate(names):
+        try:
+            return READER_BACKENDS[name].read(file, spec)
+        except Exception:
+            if i == len(names) - 1:
+                raise
+            file.seek(0)
@@ -0,0 +1,155 @@
+"""跨表对账：按S/N#关联MC Info、Relocation和Stock数据，找出来源缺失、重复序列号和CD Code不一致"""
+import numpy as np
+import pandas as pd
+
+from docs_store import normalize_keys
+
+# 对账来源及各自的CD Code列；普通Stock和二合一Stock同属Stock来源组
+SOURCE_CODE_COLUMNS = {
+    'MC Info': ('CD Code',),
+    'Relocation': ('From_CD Code', 'To_CD Code'),
+    'Stock': ('CD Code',),
+    '二合一Stock': ('CD Code_End User', 'CD Code_Distributor'),
+}
+SOURCE_GROUPS = {'MC Info': 'MC Info', 'Relocation': 'Relocation', 'Stock': 'Stock', '二合一Stock': 'Stock'}
+RECONCILE_SHEETS = ('对账-来源缺失', '对账-重复序列号', '对账-CD Code不一致')
+
+
+def _codes(values):
+    """CD Code比对用的键：去掉空白和开头的#，不区分大小写"""
+    return normalize_keys(values).str.lstrip('#')
+
+
+def _join_unique(df, keys, column, sep='；'):
+    """每组内column的不重复值按出现顺序拼接"""
+    unique = df.drop_duplicates(keys + [column])
+    groups = unique.groupby(keys, sort=False)
+    codes = groups.ngroup().to_numpy()
+    # 按组号稳定排序后一次切分，避免逐组构造Series
+    order = np.argsort(codes, kind='stable')
+    values = unique[column].astype(str).to_numpy(dtype=object)[order]
+    chunks = np.split(values, np.flatnonzero(np.diff(codes[order])) + 1)
+    return pd.Series([sep.join(chunk) for chunk in chunks], index=groups.size().index, name=column)
+
+
+def _column(df, column):
+    if column in df.columns:
+        return df[column].to_numpy()
+    return pd.Series(pd.NA, index=df.index).to_numpy()
+
+
+def machine_rows(mc_data, rel_data, stock_data, combined_stock_data):
+    """四个来源的机器行合并为一张长表，key为规范化后的S/N#，空S/N#的行不参与对账"""
+    frames = dict(zip(SOURCE_CODE_COLUMNS, (mc_data, rel_data, stock_data, combined_stock_data)))
+    parts = []
+    for source, df in frames.items():
+        if df is None or df.empty:
+            continue
+        part = pd.DataFrame({
+            '来源': source,
+            '来源组': SOURCE_GROUPS[source],
+            'key': normalize_keys(df['S/N#']).to_numpy(),
+            'S/N#': df['S/N#'].to_numpy(),
+            'Machine Type': _column(df, 'Machine Type'),
+            'File_name': _column(df, 'File_name'),
+        })
+        for n, column in enumerate(SOURCE_CODE_COLUMNS[source]):
+            part[f'code{n}'] = _column(df, column)
+        parts.append(part[part['key'] != ''])
+    if not parts:
+        return None
+    return pd.concat(parts, ignore_index=True)
+
+
+def missing_machines(machines):
+    """只出现在部分来源组中的S/N#；只比较有数据的来源组"""
+    groups = machines['来源组'].unique()
+    if len(groups) < 2:
+        return pd.DataFrame()
+    counts = machines.groupby(['key', '来源'], sort=False).size().unstack(fill_value=0)
+    counts = counts[[source for source in SOURCE_CODE_COLUMNS if source in counts.columns]]
+    present = machines.groupby(['key', '来源组'], sort=False).size().unstack(fill_value=0) > 0
+    present = present.reindex(counts.index)
+    incomplete = ~present.all(axis=1)
+    if not incomplete.any():
+        return pd.DataFrame()
+
+    first = machines.drop_duplicates('key').set_index('key')
+    report = counts[incomplete].copy()
+    report.columns.name = None
+    missing = present[incomplete]
+    report.insert(0, 'Machine Type', first.loc[report.index, 'Machine Type'].to_numpy())
+    report.insert(0, 'S/N#', first.loc[report.index, 'S/N#'].to_numpy())
+    labels = pd.Series('', index=missing.index)
+    for group in missing.columns:
+        labels += np.where(missing[group].to_numpy(), '', f'{group}、')
+    report['缺失来源'] = labels.str.rstrip('、')
+    return report.reset_index(drop=True)
+
+
+def duplicate_serials(machines):
+    """同一来源组内出现多次的S/N#（不同文件重复或同一文件内重复）"""
+    sizes = machines.groupby(['来源组', 'key'], sort=False)['File_name'].transform('size')
+    duplicated = machines[sizes > 1]
+    if duplicated.empty:
+        return pd.DataFrame()
+    report = duplicated.groupby(['来源组', 'key'], sort=False).agg(**{
+        'S/N#': ('S/N#', 'first'),
+        'Machine Type': ('Machine Type', 'first'),
+        '出现次数': ('File_name', 'size'),
+        '文件数': ('File_name', 'nunique'),
+    })
+    report['文件'] = _join_unique(duplicated, ['来源组', 'key'], 'File_name')
+    report = report.reset_index().drop(columns='key').rename(columns={'来源组': '来源'})
+    return report[['来源', 'S/N#', 'Machine Type', '出现次数', '文件数', '文件']]
+
+
+def code_mismatches(machines):
+    """Relocation的From/To CD Code与同一S/N#在MC Info / Stock文件中的CD Code都不相同的情况
+
+    对照文件中所有CD Code（二合一为End User和Distributor）都不等于From或To时记为不一致；
+    任一方CD Code为空时无法判断，不计入。
+    """
+    rel = machines[machines['来源'] == 'Relocation']
+    ref = machines[machines['来源组'] != 'Relocation']
+    if rel.empty or ref.empty:
+        return pd.DataFrame()
+
+    rel = rel.assign(rel_row=rel.index, from_key=_codes(rel['code0']), to_key=_codes(rel['code1']))
+    rel = rel[(rel['from_key'] != '') | (rel['to_key'] != '')]
+    ref_codes = ref.melt(id_vars=['key', '来源', 'File_name'], value_vars=[c for c in ('code0', 'code1') if c in ref],
+                         value_name='对照CD Code').dropna(subset=['对照CD Code'])
+    ref_codes = ref_codes.assign(code_key=_codes(ref_codes['对照CD Code']))
+    ref_codes = ref_codes[ref_codes['code_key'] != '']
+
+    # 按S/N#哈希连接，再按 (Relocation行, 对照文件) 判断是否有任一CD Code相同
+    pairs = rel[['rel_row', 'key', 'from_key', 'to_key']].merge(ref_codes, on='key')
+    if pairs.empty:
+        return pd.DataFrame()
+    pairs['matched'] = (pairs['code_key'] == pairs['from_key']) | (pairs['code_key'] == pairs['to_key'])
+    keys = ['rel_row', '来源', 'File_name']
+    mismatched = pairs[~pairs.groupby(keys, sort=False)['matched'].transform('any')]
+    if mismatched.empty:
+        return pd.DataFrame()
+    grouped = _join_unique(mismatched, keys, '对照CD Code').reset_index()
+
+    rel_rows = machines.loc[grouped['rel_row']]
+    return pd.DataFrame({
+        'S/N#': rel_rows['S/N#'].to_numpy(),
+        'Machine Type': rel_rows['Machine Type'].to_numpy(),
+        'From_CD Code': rel_rows['code0'].to_numpy(),
+        'To_CD Code': rel_rows['code1'].to_numpy(),
+        'Relocation文件': rel_rows['File_name'].to_numpy(),
+        '对照来源': grouped['来源'].to_numpy(),
+        '对照CD Code': grouped['对照CD Code'].to_numpy(),
+        '对照文件': grouped['File_name'].to_numpy(),
+    })
+
+
+def reconcile(mc_data, rel_data, stock_data, combined_stock_data):
+    """三项对账结果 {sheet名: DataFrame}，可直接并入整合报告"""
+    machines = machine_rows(mc_data, rel_data, stock_data, combined_stock_data)
+    if machines is None:
+        return dict.fromkeys(RECONCILE_SHEETS, pd.DataFrame())
+    return dict(zip(RECONCILE_SHEETS, (missing_machines(machines), duplicate_serials(machines),
+                                       code_mismatches(machines))))
@@ -0,0 +1,111 @@
+"""解析调度：全部会话共享一个有界进程池，按会话轮转分配解析名额，避免多人同时上传时CPU超载"""
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class ParseScheduler:
+    """服务器级解析调度器（进程内共享，线程安全）
+
+    max_workers为全服务器同时解析的文件数上限。每个会话（session）有自己的等待队列，
+    有空闲名额时按会话轮转取下一个任务，某个会话上传大批文件不会让其他会话一直排队；
+    submit()的limit为该会话自己最多同时占用的名额。
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._queues = OrderedDict()  # 会话 → 等待中的 (Future, 函数, 参数)，顺序即轮转顺序
+        self._running = {}  # 会话 → 正在解析的任务数
+        self._limits = {}
+        self._active = 0
+
+    def submit(self, session, fn, payload, limit=None):
+        """排入会话的等待队列，返回Future；轮到该任务时在进程池中执行fn(payload)"""
+        future = Future()
+        with self._lock:
+            self._queues.setdefault(session, deque()).append((future, fn, payload))
+            self._limits[session] = max(1, min(limit or self.max_workers, self.max_workers))
+        self._dispatch()
+        return future
+
+    def status(self, session):
+        """会话的排队情况：running / queued 为本会话正在解析和等待的任务数，
+        position为轮转顺序中排在本会话之前、同样在等待的会话数 + 1（0表示没有等待的任务）"""
+        with self._lock:
+            waiting = [key for key, queue in self._queues.items() if queue]
+            return {
+                'running': self._running.get(session, 0),
+                'queued': len(self._queues.get(session, ())),
+                'position': waiting.index(session) + 1 if session in waiting else 0,
+                'active': self._active,
+                'max_workers': self.max_workers
+            }
+
+    # ================== 调度 ==================
+    def _next_job(self):
+        """按轮转顺序取第一个未达到自身上限的会话的任务，已取消的任务直接丢弃"""
+        for session, queue in list(self._queues.items()):
+            while queue and self._running.get(session, 0) < self._limits[session]:
+                future, fn, payload = queue.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._queues.move_to_end(session)
+                return session, future, fn, payload
+            if not queue and not self._running.get(session):
+                del self._queues[session]
+                self._limits.pop(session, None)
+        return None
+
+    def _dispatch(self):
+        launched = []
+        with self._lock:
+            while self._active < self.max_workers:
+                job = self._next_job()
+                if job is None:
+                    break
+                session = job[0]
+                self._running[session] = self._running.get(session, 0) + 1
+                self._active += 1
+                launched.append(job)
+            if launched and self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            executor = self._executor
+        for session, future, fn, payload in launched:
+            try:
+                inner = executor.submit(fn, payload)
+            except Exception as e:
+                self._done(session, future, executor, error=e)
+                continue
+            inner.add_done_callback(lambda inner, session=session, future=future:
+                                    self._done(session, future, executor, inner))
+
+    def _done(self, session, future, executor, inner=None, error=None):
+        if inner is not None:
+            error = inner.exception()
+        if error is None:
+            future.set_result(inner.result())
+        else:
+            future.set_exception(error)
+        with self._lock:
+            self._active -= 1
+            self._running[session] -= 1
+            if not self._running[session]:
+                del self._running[session]
+                if not self._queues.get(session):
+                    self._queues.pop(session, None)
+                    self._limits.pop(session, None)
+            # 子进程异常退出后进程池不可再用，下次派发时重建
+            if isinstance(error, BrokenProcessPool) and self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        self._dispatch()
+
+
+def scheduler_from_env():
+    """全服务器同时解析的文件数：ANMAO_MAX_WORKERS，默认为CPU核数"""
+    max_workers = os.environ.get('ANMAO_MAX_WORKERS')
+    return ParseScheduler(int(max_workers) if max_workers else None)
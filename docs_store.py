@@ -0,0 +1,314 @@
+"""按来源文件分区保存提取结果，合并表按数据版本延迟生成
+
+结果以紧凑形式保存：只含字符串的CD Code / Machine Type / File_name 为category，S/N#为字符串dtype，
+导出时再还原为提取时的原始类型。
+"""
+from collections import OrderedDict
+from importlib.util import find_spec
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+DATA_KEYS = ('mc_data', 'rel_data', 'stock_data')
+# 预览区可筛选的字段；CD Code匹配所有名称含"CD Code"的列（From_CD Code、CD Code_End User等）
+FILTER_FIELDS = ('S/N#', 'Machine Type', 'CD Code', 'File_name')
+
+# 安装了pyarrow时使用Arrow字符串（连续内存，每行只占内容长度加偏移量）
+STRING_DTYPE = pd.StringDtype('pyarrow') if find_spec('pyarrow') else pd.StringDtype()
+
+# S/N#原始类型码，导出时据此还原
+SN_STR, SN_INT, SN_FLOAT, SN_NAN, SN_NONE = range(5)
+
+
+class Partition(NamedTuple):
+    """单个来源文件的提取结果"""
+    file_type: str
+    data_key: str
+    combined: bool
+    data: pd.DataFrame
+    dtypes: Optional[pd.Series] = None
+    sn_types: Optional[np.ndarray] = None
+    raw_bytes: int = 0
+
+
+# ================== 紧凑存储 ==================
+def _category_columns(df):
+    return [col for col in df.columns if col in ('Machine Type', 'File_name') or 'CD Code' in str(col)]
+
+
+def _is_text(series):
+    """只含字符串（及NaN）的列才转为category，转回原dtype时取值不变；
+    含数字、布尔、None等的object列转为category会合并True / 1 / 1.0、None变为NaN，保持原样"""
+    if isinstance(series.dtype, pd.StringDtype):
+        return True
+    if series.dtype != object:
+        return False
+    return all(isinstance(value, str) or (isinstance(value, float) and value != value) for value in series.to_numpy())
+
+
+def _sn_types(values):
+    """object型S/N#逐个值的类型码；含其他类型（日期、布尔等）时返回None，不做转换"""
+    codes = np.empty(len(values), dtype=np.int8)
+    for i, value in enumerate(values):
+        if isinstance(value, str):
+            codes[i] = SN_STR
+        elif value is None:
+            codes[i] = SN_NONE
+        elif isinstance(value, float):
+            codes[i] = SN_NAN if value != value else SN_FLOAT
+        elif type(value) is int:
+            codes[i] = SN_INT
+        else:
+            return None
+    return codes
+
+
+def _numeric_sn(dtype):
+    """数值型S/N#列按dtype还原；布尔列不转换（"False"按astype(bool)还原为True）"""
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _sn_strings(series):
+    """S/N#的字符串形式，空值为None"""
+    return pd.array([None if pd.isna(value) else str(value) for value in series], dtype=STRING_DTYPE)
+
+
+def compact_frame(df):
+    """重复字段转为category、S/N#转为字符串dtype，返回 (紧凑表, S/N#类型码)
+
+    数值型S/N#列按dtype还原，不需要类型码；object列中含无法还原的类型时S/N#保持原样。
+    """
+    data = df.copy()
+    for column in _category_columns(data):
+        if _is_text(data[column]):
+            data[column] = data[column].astype('category')
+    sn_types = None
+    if 'S/N#' in data.columns:
+        if data['S/N#'].dtype == object:
+            sn_types = _sn_types(data['S/N#'].to_numpy())
+            if sn_types is not None:
+                data['S/N#'] = _sn_strings(data['S/N#'])
+        elif _numeric_sn(data['S/N#'].dtype):
+            data['S/N#'] = _sn_strings(data['S/N#'])
+    return data, sn_types
+
+
+def expand_frame(data, dtypes, sn_types):
+    """compact_frame的逆操作：还原各列的原始dtype和S/N#的原始类型"""
+    data = data.copy()
+    for column in data.columns:
+        if isinstance(data[column].dtype, pd.CategoricalDtype):
+            data[column] = data[column].astype(dtypes[column])
+    if sn_types is not None:
+        strings = data['S/N#'].to_numpy(dtype=object)
+        values = np.empty(len(strings), dtype=object)
+        for code, convert in ((SN_STR, str), (SN_INT, int), (SN_FLOAT, float)):
+            selected = sn_types == code
+            values[selected] = [convert(value) for value in strings[selected]]
+        values[sn_types == SN_NAN] = np.nan
+        values[sn_types == SN_NONE] = None
+        data['S/N#'] = pd.Series(values, index=data.index, dtype=object)
+    elif 'S/N#' in data.columns and _numeric_sn(dtypes['S/N#']):
+        values = data['S/N#'].to_numpy(dtype=object, na_value=np.nan)
+        data['S/N#'] = pd.Series(values, index=data.index).astype(dtypes['S/N#'])
+    return data
+
+
+def _recategorize(data):
+    """拼接时各分区的category取值不同会退化为普通列，重新编码；S/N#统一为字符串dtype"""
+    for column in _category_columns(data):
+        if _is_text(data[column]):
+            data[column] = data[column].astype('category')
+    if 'S/N#' in data.columns and data['S/N#'].dtype != STRING_DTYPE:
+        data['S/N#'] = _sn_strings(data['S/N#'])
+    return data
+
+
+class ResultStore:
+    """每个来源文件一个分区；合并后的DataFrame每个数据版本只拼接一次"""
+
+    def __init__(self):
+        self._partitions = OrderedDict()
+        self._versions = dict.fromkeys(DATA_KEYS, 0)
+        self._frames = {}
+        self._indexes = {}
+
+    def __contains__(self, file_name):
+        return file_name in self._partitions
+
+    def __len__(self):
+        return len(self._partitions)
+
+    def add(self, file_type, data_key, file_name, data):
+        """写入文件分区；同名文件已存在时原位替换"""
+        old = self._partitions.get(file_name)
+        if old is not None:
+            self._versions[old.data_key] += 1
+        compact, sn_types = compact_frame(data)
+        self._partitions[file_name] = Partition(file_type, data_key, '二合一' in file_name, compact,
+                                                data.dtypes, sn_types, int(data.memory_usage(deep=True).sum()))
+        self._versions[data_key] += 1
+
+    def remove(self, file_name):
+        """删除文件分区，返回是否存在"""
+        old = self._partitions.pop(file_name, None)
+        if old is None:
+            return False
+        self._versions[old.data_key] += 1
+        return True
+
+    def version(self, data_key):
+        return self._versions[data_key]
+
+    def versions(self):
+        return tuple(self._versions[key] for key in DATA_KEYS)
+
+    def file_names(self, data_key=None):
+        return [name for name, part in self._partitions.items() if data_key is None or part.data_key == data_key]
+
+    def count(self, data_key):
+        return len(self.file_names(data_key))
+
+    def items(self):
+        """按上传顺序返回 (file_name, file_type, data_key, 原始类型的数据)，用于转存到其他存储"""
+        for file_name, part in self._partitions.items():
+            yield file_name, part.file_type, part.data_key, expand_frame(part.data, part.dtypes, part.sn_types)
+
+    def frame(self, data_key, combined=None):
+        """按上传顺序合并的结果表，没有数据时返回None
+
+        combined为True / False时只取（不取）二合一文件的行，列与完整合并表相同。
+        """
+        cache_key = (data_key, combined)
+        cached = self._frames.get(cache_key)
+        if cached is not None and cached[0] == self._versions[data_key]:
+            return cached[1]
+
+        parts = [part for part in self._partitions.values() if part.data_key == data_key]
+        if not parts:
+            data = None
+        elif combined is None:
+            data = _recategorize(pd.concat([part.data for part in parts], ignore_index=True))
+        else:
+            # 按分区元数据生成行掩码，无需再对File_name做字符串匹配
+            mask = np.repeat([part.combined == combined for part in parts], [len(part.data) for part in parts])
+            data = self.frame(data_key)[mask]
+        self._frames[cache_key] = (self._versions[data_key], data)
+        return data
+
+    def export_frame(self, data_key, combined=None):
+        """导出用的结果表：各分区还原为原始类型后按上传顺序合并，行列与frame()一致"""
+        parts = [part for part in self._partitions.values() if part.data_key == data_key]
+        if not parts:
+            return None
+        data = pd.concat([expand_frame(part.data, part.dtypes, part.sn_types) for part in parts], ignore_index=True)
+        if combined is None:
+            return data
+        mask = np.repeat([part.combined == combined for part in parts], [len(part.data) for part in parts])
+        return data[mask]
+
+    def memory_usage(self):
+        """本会话结果占用的内存（字节）：分区、合并表及索引缓存，以及未压缩时的估算大小"""
+        partitions = sum(int(part.data.memory_usage(deep=True).sum()) for part in self._partitions.values())
+        frames = {id(data): data for _, data in self._frames.values() if data is not None}
+        frames = sum(int(data.memory_usage(deep=True).sum()) for data in frames.values())
+        indexes = sum(index.memory_usage() for _, index in self._indexes.values() if index is not None)
+        return {
+            'partitions': partitions,
+            'frames': frames,
+            'indexes': indexes,
+            'total': partitions + frames + indexes,
+            'raw': sum(part.raw_bytes for part in self._partitions.values())
+        }
+
+    def index(self, data_key):
+        """合并表的查询索引，与frame()一样每个数据版本只建立一次"""
+        cached = self._indexes.get(data_key)
+        if cached is not None and cached[0] == self._versions[data_key]:
+            return cached[1]
+        data = self.frame(data_key)
+        index = FrameIndex(data) if data is not None else None
+        self._indexes[data_key] = (self._versions[data_key], index)
+        return index
+
+
+def _integral_key(value):
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+
+def normalize_keys(values):
+    """统一为去掉首尾空白的大写字符串，空值为空字符串；数字型S/N#与文本型可互相匹配
+
+    整数值的浮点数按整数写出：含空值的数字列读取为float，1234567.0与另一来源的1234567应为同一个键。
+    """
+    keys = values.astype(object).where(values.notna(), '')
+    if pd.api.types.is_float_dtype(values.dtype):
+        numbers = values.to_numpy(dtype='float64', na_value=np.nan)
+        integral = np.isfinite(numbers) & (np.floor(numbers) == numbers)
+        if integral.any():
+            objects = keys.to_numpy(dtype=object, copy=True)
+            objects[integral] = [int(v) for v in numbers[integral]]
+            keys = pd.Series(objects, index=keys.index, dtype=object)
+    elif pd.api.types.infer_dtype(keys, skipna=True) not in ('string', 'empty'):
+        keys = keys.map(_integral_key)
+    return keys.astype(str).str.strip().str.upper()
+
+
+class FrameIndex:
+    """合并表的字段索引：每列预先编码为 不重复值 + 行编号，各字段在首次查询时建立
+
+    查询只在不重复值上做字符串匹配，再用编号一次性映射回行号，结果集很大时查S/N#也很快。
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._postings = {}
+
+    def columns(self, field):
+        if field == 'CD Code':
+            return [col for col in self.data.columns if 'CD Code' in str(col)]
+        return [field] if field in self.data.columns else []
+
+    def _column_index(self, column):
+        """(不重复值Index, 每行对应的值编号)"""
+        index = self._postings.get(column)
+        if index is None:
+            codes, uniques = pd.factorize(normalize_keys(self.data[column]))
+            # 不重复值用Arrow字符串保存，包含匹配在Arrow的C实现中执行，不逐个调用Python字符串方法
+            index = (pd.Index(uniques, dtype=STRING_DTYPE), codes)
+            self._postings[column] = index
+        return index
+
+    def lookup(self, field, term):
+        """按包含关系匹配field的行号（升序），不区分大小写（与历史库查询的 LIKE '%关键字%' 一致）"""
+        term = str(term).strip().upper()
+        mask = np.zeros(len(self.data), dtype=bool)
+        for column in self.columns(field):
+            uniques, codes = self._column_index(column)
+            matched = np.asarray(uniques.str.contains(term, regex=False), dtype=bool)
+            mask |= matched[codes]
+        return np.flatnonzero(mask)
+
+    def search(self, filters):
+        """按 {字段: 关键字} 同时筛选（各条件取交集），空关键字忽略；没有条件时返回None表示全部行"""
+        rows = None
+        for field, term in filters.items():
+            if term is None or not str(term).strip():
+                continue
+            hits = self.lookup(field, term)
+            rows = hits if rows is None else np.intersect1d(rows, hits, assume_unique=True)
+        return rows
+
+    def __len__(self):
+        return len(self.data)
+
+    def memory_usage(self):
+        return sum(codes.nbytes + int(uniques.memory_usage(deep=True)) for uniques, codes in self._postings.values())
+
+    def page(self, rows, page, page_size):
+        """取第page页（从1开始）的数据；rows为None时按全部行分页"""
+        start = (page - 1) * page_size
+        if rows is None:
+            return self.data.iloc[start:start + page_size]
+        return self.data.take(rows[start:start + page_size])
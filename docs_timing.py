@@ -0,0 +1,93 @@
+"""处理耗时记录：按文件和阶段累计耗时，供页面耗时分析面板和导出使用"""
+import json
+from contextlib import contextmanager
+from time import perf_counter
+
+import pandas as pd
+
+STAGE_LABELS = {
+    'cache': '缓存查询',
+    'read': '读取工作簿',
+    'layout': '版式识别',
+    'extract': '行提取',
+    'accumulate': '结果累积',
+    'concat': '合并表生成',
+    'render': '表格渲染',
+    'export': '导出生成',
+    'reconcile': '跨表对账',
+}
+
+
+@contextmanager
+def timed(timings, stage):
+    """把代码块耗时累加到 timings[stage]；timings为None时不计时"""
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + perf_counter() - start
+
+
+class TimingLog:
+    """一个会话的耗时记录，kind为file（单个文件）或page（表格渲染、导出等页面阶段）"""
+
+    COLUMNS = ['kind', 'item', 'stage', 'seconds']
+
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+
+    def add(self, kind, item, stage, seconds):
+        if self.enabled:
+            self.records.append({'kind': kind, 'item': item, 'stage': stage, 'seconds': seconds})
+
+    def add_file(self, file_name, timings):
+        for stage, seconds in (timings or {}).items():
+            self.add('file', file_name, stage, seconds)
+
+    @contextmanager
+    def measure(self, stage, item, kind='page'):
+        if not self.enabled:
+            yield
+            return
+        timings = {}
+        with timed(timings, stage):
+            yield
+        self.add(kind, item, stage, timings[stage])
+
+    def clear(self):
+        self.records = []
+
+    def frame(self):
+        return pd.DataFrame(self.records, columns=self.COLUMNS)
+
+    def stage_summary(self):
+        """各阶段的总耗时、次数、平均和最大耗时（秒）"""
+        df = self.frame()
+        summary = df.groupby('stage')['seconds'].agg(['sum', 'count', 'mean', 'max'])
+        summary = summary.sort_values('sum', ascending=False)
+        summary.index = [STAGE_LABELS.get(stage, stage) for stage in summary.index]
+        summary.columns = ['总耗时(s)', '次数', '平均(s)', '最大(s)']
+        return summary
+
+    def slowest_files(self, limit=10):
+        """最慢的文件及其各阶段耗时（秒）"""
+        df = self.frame()
+        df = df[df['kind'] == 'file']
+        if df.empty:
+            return pd.DataFrame()
+        table = df.pivot_table(index='item', columns='stage', values='seconds', aggfunc='sum', fill_value=0.0)
+        table['total'] = table.sum(axis=1)
+        table = table.sort_values('total', ascending=False).head(limit)
+        table.columns = [STAGE_LABELS.get(col, '合计' if col == 'total' else col) for col in table.columns]
+        table.index.name = '文件'
+        return table
+
+    def to_csv(self):
+        return self.frame().to_csv(index=False).encode('utf-8-sig')
+
+    def to_json(self):
+        return json.dumps(self.records, ensure_ascii=False, indent=2).encode('utf-8')
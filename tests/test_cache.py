@@ -0,0 +1,103 @@
+"""解析结果缓存（docs_cache.ParseCache）的LRU淘汰与磁盘层容错测试
+
+运行：python -m pytest -q tests
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docs_cache import ParseCache, cache_key  # noqa: E402
+
+
+def _frame(rows, tag='x'):
+    return pd.DataFrame({'S/N#': [f"{tag}{i}" for i in range(rows)], 'File_name': 'a.xlsx'})
+
+
+def _size(data):
+    return int(data.memory_usage(deep=True).sum())
+
+
+def test_get_tags_copy_with_current_file_name():
+    cache = ParseCache()
+    data = _frame(3)
+    cache.put('k', data)
+    hit = cache.get('k', 'b.xlsx')
+    assert (hit['File_name'] == 'b.xlsx').all()
+    assert (data['File_name'] == 'a.xlsx').all()
+    assert cache.get('missing', 'b.xlsx') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_memory_layer_evicts_least_recently_used():
+    one = _frame(20)
+    cache = ParseCache(max_memory_bytes=_size(one) * 2)
+    cache.put('a', _frame(20, 'a'))
+    cache.put('b', _frame(20, 'b'))
+    # 访问a后再写入c，淘汰最久未使用的b
+    assert cache.get('a', 'x.xlsx') is not None
+    cache.put('c', _frame(20, 'c'))
+    assert cache.get('b', 'x.xlsx') is None
+    assert cache.get('a', 'x.xlsx') is not None
+    assert cache.get('c', 'x.xlsx') is not None
+    assert cache.stats()['memory_bytes'] <= cache.max_memory_bytes
+
+
+def test_memory_layer_skips_entries_larger_than_limit():
+    cache = ParseCache(max_memory_bytes=10)
+    cache.put('a', _frame(20))
+    assert cache.stats()['entries'] == 0
+
+
+def test_disk_layer_hit_after_memory_eviction(tmp_path):
+    cache = ParseCache(max_memory_bytes=0, disk_dir=str(tmp_path))
+    cache.put('a', _frame(5))
+    hit = cache.get('a', 'b.xlsx')
+    assert hit is not None
+    assert hit['S/N#'].tolist() == _frame(5)['S/N#'].tolist()
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_disk_layer_evicts_oldest_files(tmp_path):
+    cache = ParseCache(max_memory_bytes=0, disk_dir=str(tmp_path))
+    cache.put('a', _frame(50, 'a'))
+    one = os.path.getsize(cache._disk_path('a'))
+    cache.max_disk_bytes = one * 2 + one // 2
+    old = time.time() - 100
+    os.utime(cache._disk_path('a'), (old, old))
+    cache.put('b', _frame(50, 'b'))
+    cache.put('c', _frame(50, 'c'))
+    assert not os.path.exists(cache._disk_path('a'))
+    assert os.path.exists(cache._disk_path('b'))
+    assert os.path.exists(cache._disk_path('c'))
+
+
+def test_corrupt_disk_entry_is_a_miss_and_removed(tmp_path):
+    cache = ParseCache(max_memory_bytes=0, disk_dir=str(tmp_path))
+    cache.put('a', _frame(50))
+    path = cache._disk_path('a')
+    with open(path, 'rb') as fh:
+        content = fh.read()
+    with open(path, 'wb') as fh:
+        fh.write(content[:len(content) // 2])
+    assert cache.get('a', 'b.xlsx') is None
+    assert not os.path.exists(path)
+    assert cache.stats()['misses'] == 1
+
+    with open(path, 'wb') as fh:
+        fh.write(b'not a pickle')
+    assert cache.get('a', 'b.xlsx') is None
+    assert not os.path.exists(path)
+
+
+def test_cache_key_depends_on_template_reader_and_content():
+    key = cache_key('MC', b'abc', 'calamine')
+    assert key == cache_key('MC', b'abc', 'calamine')
+    assert key != cache_key('STOCK', b'abc', 'calamine')
+    assert key != cache_key('MC', b'abc', 'openpyxl')
+    assert key != cache_key('MC', b'abd', 'calamine')
@@ -0,0 +1,61 @@
+"""后台解析线程（docs_ingest.IngestWorker）的重复上传判断测试
+
+运行：python -m pytest -q tests
+"""
+import os
+import sys
+import time
+from io import BytesIO
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from docs_ingest import DONE, DUPLICATE, IngestWorker  # noqa: E402
+from generate_workbooks import generate  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def workbook(tmp_path_factory):
+    [(_, _, path)] = generate(str(tmp_path_factory.mktemp('ingest')), ('MC',), ('xlsx',), rows=10)
+    with open(path, 'rb') as fh:
+        return os.path.basename(path), fh.read()
+
+
+def _upload(workbook):
+    name, content = workbook
+    file = BytesIO(content)
+    file.name = name
+    return file
+
+
+def _run(worker, workbook, known_names=()):
+    worker.submit([_upload(workbook)], known_names=known_names)
+    deadline = time.monotonic() + 60
+    while worker.busy:
+        worker.drain()
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return worker.statuses()[-1][1]
+
+
+def test_known_and_repeated_names_are_skipped(workbook):
+    worker = IngestWorker()
+    assert _run(worker, workbook, known_names=[workbook[0]]) == DUPLICATE
+
+    worker = IngestWorker()
+    assert _run(worker, workbook) == DONE
+    assert _run(worker, workbook) == DUPLICATE
+
+
+def test_reset_seen_follows_the_replaced_store(workbook):
+    worker = IngestWorker()
+    assert _run(worker, workbook) == DONE
+    # 载入了不含该文件的历史批次：重新上传应再次解析
+    worker.reset_seen([])
+    assert _run(worker, workbook) == DONE
+    # 载入了含该文件的批次：重新上传跳过
+    worker.reset_seen([workbook[0]])
+    assert _run(worker, workbook) == DUPLICATE
@@ -0,0 +1,53 @@
+"""Relocation版式识别（docs_layout）测试
+
+运行：python -m pytest -q tests
+"""
+import json
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docs_layout import REL_TITLE_ROWS, LayoutRegistry, fingerprint  # noqa: E402
+
+
+def _sheet(title=('Machine Type', None, None, 'S/N#'), remark='Supplier A'):
+    grid = [[None] * 10 for _ in range(40)]
+    grid[10][1] = remark
+    grid[REL_TITLE_ROWS[-1]][1:1 + len(title)] = title
+    return pd.DataFrame(grid)
+
+
+def test_fingerprint_only_depends_on_title_rows():
+    key = fingerprint(_sheet())
+    # 表头其余区域的逐文件文字、列标题的大小写和空白不影响指纹
+    assert fingerprint(_sheet(remark='Supplier B 2024-05-06')) == key
+    assert fingerprint(_sheet(title=(' machine  type', None, None, 's/n#'))) == key
+    assert fingerprint(_sheet(title=('Machine Type', None, 'S/N#'))) != key
+    assert fingerprint(pd.DataFrame([[None]] * 5)) == fingerprint(pd.DataFrame())
+
+
+def test_registry_flags_new_layouts_and_mode_changes(tmp_path):
+    path = str(tmp_path / 'layouts.json')
+    layouts = LayoutRegistry(path)
+    assert layouts.record('k1', 'REL1', 'a.xlsx') is None
+    assert layouts.record('k1', 'REL1', 'b.xlsx') == 'REL1'
+    assert layouts.record('k1', 'REL3', 'c.xlsx') == 'REL1'
+    assert layouts.entries() == [{'指纹': 'k1', '抓取模式': 'REL3', '首个文件': 'a.xlsx', '文件数': 3, '模式变化': 1}]
+
+    reloaded = LayoutRegistry(path)
+    assert reloaded.record('k1', 'REL3', 'd.xlsx') == 'REL3'
+
+
+def test_registry_ignores_files_from_older_fingerprints(tmp_path):
+    path = str(tmp_path / 'layouts.json')
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump({'old': {'plan': 'MC', 'first_file': 'a.xlsx', 'files': 1}}, fh)
+    assert LayoutRegistry(path).entries() == []
+
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write('not json')
+    assert LayoutRegistry(path).entries() == []
@@ -0,0 +1,103 @@
+"""提取结果与原始流程的一致性测试
+
+用 benchmarks/generate_workbooks.py 生成覆盖全部模板（MC、Relocation模式1~4、普通Stock、二合一Stock）
+和 xls / xlsx / xlsm 三种格式的工作簿，比较 process_file 的结果与原始流程：
+pd.read_excel(header=None) 读取整个工作表，再交给逐格扫描的参考实现（tools/parity_check.py）。
+footer一组为纯数字的CD Code / S/N#加读取窗口之外的签名区文字，整表读取时取值列的类型推断与只看窗口时不同。
+
+运行：python -m pytest -q tests
+"""
+import os
+import sys
+from importlib.util import find_spec
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+
+from docs_layout import LayoutRegistry  # noqa: E402
+from docs_processing import classify_file, process_file, process_files  # noqa: E402
+from docs_reader import template_key  # noqa: E402
+from generate_workbooks import FORMATS, TEMPLATES, generate  # noqa: E402
+from parity_check import EXTRACTORS  # noqa: E402
+
+# 工作簿组 → generate()的参数
+VARIANTS = {
+    'plain': {'padding_rows': 30},
+    'footer': {'padding_rows': 70, 'numeric_ids': True, 'footer': True},
+}
+CASES = [(variant, template, fmt) for variant in VARIANTS for template in TEMPLATES for fmt in FORMATS]
+
+
+@pytest.fixture(scope='module')
+def workbooks(tmp_path_factory):
+    """{(组, 模板, 格式): [文件路径]}；写xls需要xlwt，未安装时只生成xlsx / xlsm"""
+    formats = [fmt for fmt in FORMATS if fmt != 'xls' or find_spec('xlwt') is not None]
+    generated = {}
+    for variant, options in VARIANTS.items():
+        out_dir = tmp_path_factory.mktemp(variant)
+        for template, fmt, path in generate(str(out_dir), TEMPLATES, formats, rows=40, files=2, **options):
+            generated.setdefault((variant, template, fmt), []).append(path)
+    return generated
+
+
+def _named(path):
+    with open(path, 'rb') as fh:
+        file = BytesIO(fh.read())
+    file.name = os.path.basename(path)
+    return file
+
+
+def baseline_rows(path):
+    """原始流程：按扩展名选择引擎读取整个工作表，再按模板交给逐格扫描的参考实现"""
+    file = _named(path)
+    engine = 'xlrd' if file.name.endswith('.xls') else 'openpyxl'
+    df = pd.read_excel(file, header=None, engine=engine)
+    legacy, _ = EXTRACTORS[template_key(classify_file(file.name), file.name)]
+    return legacy(df, file.name)
+
+
+def assert_same(expected, actual):
+    assert list(actual.columns) == list(expected.columns)
+    assert (actual.dtypes == expected.dtypes).all()
+    assert actual.equals(expected)
+
+
+def _paths(workbooks, variant, template, fmt):
+    if (variant, template, fmt) not in workbooks:
+        pytest.skip(f"未生成 {fmt} 文件（写xls需要xlwt）")
+    return workbooks[(variant, template, fmt)]
+
+
+@pytest.mark.parametrize('variant, template, fmt', CASES)
+def test_process_file_matches_baseline(workbooks, variant, template, fmt):
+    for path in _paths(workbooks, variant, template, fmt):
+        file = _named(path)
+        result = process_file(classify_file(file.name), file)
+        assert result.error is None
+        assert not result.data.empty
+        assert_same(baseline_rows(path), result.data)
+
+
+@pytest.mark.parametrize('variant, template, fmt', CASES)
+def test_recorded_layout_matches_baseline(workbooks, variant, template, fmt):
+    """记录版式后再处理一遍，结果与原始流程相同；同一模板的Relocation文件为同一版式且抓取模式不变"""
+    paths = _paths(workbooks, variant, template, fmt)
+    layouts = LayoutRegistry()
+    for _ in range(2):
+        jobs = ((classify_file(os.path.basename(path)), _named(path)) for path in paths)
+        for path, result in zip(paths, process_files(jobs, layouts=layouts)):
+            assert result.error is None
+            assert 'previous' not in (result.layout or {})
+            assert_same(baseline_rows(path), result.data)
+    entries = layouts.entries()
+    if template.startswith('REL'):
+        assert [entry['抓取模式'] for entry in entries] == [template]
+        assert entries[0]['文件数'] == 2 * len(paths)
+    else:
+        assert entries == []
@@ -0,0 +1,80 @@
+"""跨表对账（docs_reconcile.reconcile）测试
+
+运行：python -m pytest -q tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docs_reconcile import RECONCILE_SHEETS, reconcile  # noqa: E402
+from docs_store import normalize_keys  # noqa: E402
+
+MISSING, DUPLICATES, MISMATCHES = RECONCILE_SHEETS
+
+
+def _mc(serials, codes=None, file_name='MC Info Sheet A.xlsx'):
+    return pd.DataFrame({
+        'Machine Type': 'YSM20R',
+        'S/N#': serials,
+        'CD Code': codes if codes is not None else '#00001',
+        'File_name': file_name,
+    })
+
+
+def _rel(serials, from_code='#00001', to_code='#00002', file_name='A-★Relocation_sheet.xlsx'):
+    return pd.DataFrame({
+        'Machine Type': 'YSM20R',
+        'S/N#': serials,
+        'From_CD Code': from_code,
+        'To_CD Code': to_code,
+        'File_name': file_name,
+    })
+
+
+def test_normalize_keys_matches_numeric_and_text_serials():
+    assert normalize_keys(pd.Series([1234567.0, np.nan, 12.5])).tolist() == ['1234567', '', '12.5']
+    assert normalize_keys(pd.Series([1234567, 89])).tolist() == ['1234567', '89']
+    assert normalize_keys(pd.Series([1234567.0, ' ab1 ', None], dtype=object)).tolist() == ['1234567', 'AB1', '']
+
+
+def test_float_and_int_serials_are_the_same_machine():
+    # 含空S/N#的MC列读取为float，Relocation为int，同一台机器不应两边都报缺失
+    report = reconcile(_mc([1234567, np.nan]), _rel([1234567]), None, None)
+    assert report[MISSING].empty
+    assert report[DUPLICATES].empty
+
+
+def test_missing_machines_lists_absent_groups():
+    report = reconcile(_mc(['A1', 'b2 ']), _rel(['a1', 'C3']), None, None)
+    missing = report[MISSING]
+    assert missing['S/N#'].tolist() == ['b2 ', 'C3']
+    assert missing['缺失来源'].tolist() == ['Relocation', 'MC Info']
+    assert missing['MC Info'].tolist() == [1, 0]
+    assert missing['Relocation'].tolist() == [0, 1]
+
+
+def test_single_source_has_nothing_to_compare():
+    report = reconcile(_mc(['A1', 'B2']), None, None, None)
+    assert report[MISSING].empty
+    assert report[MISMATCHES].empty
+
+
+def test_duplicate_serials_within_a_source_group():
+    mc = pd.concat([_mc(['A1', 'B2']), _mc(['a1'], file_name='MC Info Sheet B.xlsx')], ignore_index=True)
+    duplicates = reconcile(mc, None, None, None)[DUPLICATES]
+    assert duplicates[['来源', 'S/N#', '出现次数', '文件数']].values.tolist() == [['MC Info', 'A1', 2, 2]]
+    assert duplicates['文件'].tolist() == ['MC Info Sheet A.xlsx；MC Info Sheet B.xlsx']
+
+
+def test_code_mismatches_compare_from_and_to_codes():
+    mc = _mc(['A1', 'B2'], codes=['00002', '#00009'])
+    mismatches = reconcile(mc, _rel(['A1', 'B2']), None, None)[MISMATCHES]
+    # A1的To_CD Code与MC相同（忽略开头的#）；B2的From / To都不相同
+    assert mismatches['S/N#'].tolist() == ['B2']
+    assert mismatches['对照CD Code'].tolist() == ['#00009']
+    assert mismatches['对照来源'].tolist() == ['MC Info']
@@ -0,0 +1,84 @@
+"""结果存储（docs_store）的紧凑保存与还原测试：导出的数据应与提取结果完全相同（取值和类型）
+
+运行：python -m pytest -q tests
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from docs_history import HistoryDB, SqliteResultStore  # noqa: E402
+from docs_store import STRING_DTYPE, ResultStore, compact_frame, expand_frame  # noqa: E402
+
+# S/N#列的各种提取结果：读取引擎按列内容推断的dtype
+SERIALS = {
+    'text': pd.Series(['A1', 'B2', None], dtype=object),
+    'int': pd.Series([1234567, 7654321, 1]),
+    'float': pd.Series([1234567.0, np.nan, 2.5]),
+    'bool': pd.Series([True, False, True]),
+    'mixed': pd.Series(['A1', 1234567, 2.5, np.nan, None], dtype=object),
+    'mixed-bool': pd.Series(['A1', True, 0], dtype=object),
+    'nullable-int': pd.Series([1, None, 3], dtype='Int64'),
+    'datetime': pd.Series(pd.to_datetime(['2024-01-02', None, '2024-03-04'])),
+}
+
+
+def _frame(serials):
+    rows = len(serials)
+    return pd.DataFrame({
+        'Machine Type': pd.Series(['YSM20R', 'YRM20', np.nan, 'YSM20R', 'YSM10'][:rows], dtype=object),
+        'S/N#': serials,
+        'CD Code': pd.Series(['#00001', 12345, None, '#00002', '#00003'][:rows], dtype=object),
+        'File_name': 'MC Info Sheet A.xlsx',
+    })
+
+
+def assert_identical(expected, actual):
+    assert list(actual.columns) == list(expected.columns)
+    assert actual.dtypes.tolist() == expected.dtypes.tolist()
+    assert actual.equals(expected)
+    for column in expected.columns:
+        assert [type(value) for value in actual[column]] == [type(value) for value in expected[column]]
+
+
+@pytest.mark.parametrize('kind', SERIALS)
+def test_compact_expand_round_trip(kind):
+    data = _frame(SERIALS[kind])
+    compact, sn_types = compact_frame(data)
+    assert_identical(data, expand_frame(compact, data.dtypes, sn_types))
+
+
+def test_compact_frame_stores_serials_as_strings():
+    compact, _ = compact_frame(_frame(SERIALS['mixed']))
+    assert compact['S/N#'].dtype == STRING_DTYPE
+    assert isinstance(compact['File_name'].dtype, pd.CategoricalDtype)
+    # 含数字的CD Code列保持原样，不合并 12345 / '12345'
+    assert compact['CD Code'].dtype == object
+
+
+def test_bool_serials_are_not_stringified():
+    compact, sn_types = compact_frame(_frame(SERIALS['bool']))
+    assert sn_types is None
+    assert compact['S/N#'].dtype == bool
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request):
+    if request.param == 'memory':
+        return ResultStore()
+    return SqliteResultStore.create(HistoryDB(':memory:'))
+
+
+@pytest.mark.parametrize('kind', SERIALS)
+def test_store_items_round_trip(store, kind):
+    data = _frame(SERIALS[kind])
+    store.add('MC', 'mc_data', 'MC Info Sheet A.xlsx', data)
+    [(file_name, file_type, data_key, restored)] = list(store.items())
+    assert (file_name, file_type, data_key) == ('MC Info Sheet A.xlsx', 'MC', 'mc_data')
+    assert_identical(data, restored)
+    assert store.export_frame('mc_data')['S/N#'].equals(data['S/N#'])
@@ -0,0 +1,109 @@
+"""zip压缩包展开的成员文件名还原测试
+
+未设置UTF-8标记（0x800）的压缩包：Info-ZIP / macOS写入UTF-8原始字节，Windows中文系统写入GBK字节，
+部分工具另写Info-ZIP Unicode Path扩展字段（0x7075）。文件名还原错误会导致文件无法识别或被识别为错误的模板。
+
+运行：python -m pytest -q tests
+"""
+import os
+import struct
+import sys
+import zipfile
+import zlib
+from io import BytesIO
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from docs_processing import classify_file, iter_uploads, process_file, process_files, upload_names  # noqa: E402
+from generate_workbooks import generate  # noqa: E402
+
+
+class _RawNameInfo(zipfile.ZipInfo):
+    """按给定的原始字节写入文件名，且不设置UTF-8标记"""
+
+    def __init__(self, name, raw):
+        super().__init__(name)
+        self._raw = raw
+
+    def _encodeFilenameFlags(self):
+        return self._raw, self.flag_bits & ~0x800
+
+
+def _unicode_path_extra(raw, name):
+    data = struct.pack('<BL', 1, zlib.crc32(raw)) + name.encode('utf-8')
+    return struct.pack('<HH', 0x7075, len(data)) + data
+
+
+def _archive(members):
+    """members: [(文件名, 原始字节, 扩展字段, 内容)] → 以BytesIO表示的上传zip"""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, raw, extra, content in members:
+            info = _RawNameInfo(name, raw)
+            info.extra = extra
+            archive.writestr(info, content)
+    buffer.seek(0)
+    buffer.name = 'upload.zip'
+    return buffer
+
+
+@pytest.fixture(scope='module')
+def workbooks(tmp_path_factory):
+    """{模板: 文件路径}，文件名含★、二合一、雷特等非ASCII字符"""
+    out_dir = str(tmp_path_factory.mktemp('zip'))
+    paths = {}
+    for template, _, path in generate(out_dir, ('REL1', 'STOCK_COMBINED'), ('xlsx',), rows=20):
+        if '雷特' in path or template not in paths:
+            paths[template] = path
+    return paths
+
+
+def _read(path):
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'gbk'])
+def test_unflagged_member_names_are_restored(workbooks, encoding):
+    names = [os.path.join('资料', os.path.basename(path)).replace(os.sep, '/') for path in workbooks.values()]
+    names = [name for name in names if encoding == 'utf-8' or '★' not in name] + ['资料/雷特 MC Info.xlsx']
+    upload = _archive([(name, name.encode(encoding), b'', b'') for name in names])
+    assert upload_names([upload]) == names
+
+
+def test_unicode_path_extra_field_is_preferred():
+    name = '二合一 STOCK MACHINE-雷特.xlsx'
+    # 原文件名字节既不是UTF-8也不是GBK，只能从扩展字段还原
+    raw = b'STOCK MACHINE-\xff\xff.xlsx'
+    upload = _archive([(name, raw, _unicode_path_extra(raw, name), b'')])
+    assert upload_names([upload]) == [name]
+
+    # CRC与原文件名不符（文件名被其他工具改写过）时忽略扩展字段
+    raw = name.encode('gbk')
+    upload = _archive([(name, raw, _unicode_path_extra(b'other', 'other.xlsx'), b'')])
+    assert upload_names([upload]) == [name]
+
+
+def test_unflagged_utf8_archive_is_classified_and_extracted(workbooks):
+    members = []
+    for path in workbooks.values():
+        name = os.path.basename(path)
+        members.append((name, name.encode('utf-8'), b'', _read(path)))
+    upload = _archive(members)
+    files = list(iter_uploads([upload]))
+    assert [file.name for file in files] == [os.path.basename(path) for path in workbooks.values()]
+    assert [classify_file(file.name) for file in files] == ['REL', 'STOCK']
+    assert '二合一' in files[1].name
+
+    results = list(process_files((classify_file(file.name), file) for file in files))
+    for path, result in zip(workbooks.values(), results):
+        with open(path, 'rb') as fh:
+            file = BytesIO(fh.read())
+        file.name = os.path.basename(path)
+        expected = process_file(classify_file(file.name), file)
+        assert result.error is None
+        assert result.data.equals(expected.data)
@@ -0,0 +1,118 @@
+"""读取后端对比：各后端的读取速度，以及与内置引擎（openpyxl / xlrd）结果是否逐格一致
+
+用法：
+    python tools/compare_readers.py <文件或目录> [...]
+    python tools/compare_readers.py samples/ --sample 50 --repeat 3 -o readers.json
+
+对每个可识别的Excel文件，用每个已安装且支持该格式的后端各读取repeat次（取中位数），
+并与内置引擎的结果比较形状、取值和dtype。有任何不一致或读取失败时以非零状态退出。
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docs_processing import EXCEL_EXTENSIONS, classify_file  # noqa: E402
+from docs_reader import available_backends, builtin_backend, read_template  # noqa: E402
+
+
+def _named(content, name):
+    file = BytesIO(content)
+    file.name = name
+    return file
+
+
+def collect_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            files.append(path)
+    return [path for path in files if path.lower().endswith(EXCEL_EXTENSIONS) and classify_file(os.path.basename(path))]
+
+
+def compare_file(path, repeat):
+    """单个文件在各后端上的 {后端: {'ms', 'parity', 'error'}}"""
+    name = os.path.basename(path)
+    file_type = classify_file(name)
+    with open(path, 'rb') as fh:
+        content = fh.read()
+
+    report = {}
+    frames = {}
+    for backend in available_backends(name):
+        seconds = []
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                frames[backend] = read_template(_named(content, name), file_type, backend=backend)
+                seconds.append(time.perf_counter() - start)
+            report[backend] = {'ms': statistics.median(seconds) * 1000, 'parity': None, 'error': None}
+        except Exception as e:
+            report[backend] = {'ms': None, 'parity': False, 'error': f"{type(e).__name__}: {e}"}
+
+    reference = frames.get(builtin_backend(name))
+    for backend, df in frames.items():
+        if reference is not None:
+            report[backend]['parity'] = bool(df.shape == reference.shape and df.equals(reference)
+                                             and (df.dtypes == reference.dtypes).all())
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="读取后端速度和结果一致性对比")
+    parser.add_argument("paths", nargs='+', help="Excel文件或目录")
+    parser.add_argument("--sample", type=int, help="随机抽取的文件数（默认全部）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个文件每个后端的读取次数（取中位数）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="逐个文件的结果JSON")
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.paths)
+    if args.sample and len(files) > args.sample:
+        files = sorted(random.Random(args.seed).sample(files, args.sample))
+
+    results = {path: compare_file(path, args.repeat) for path in files}
+
+    summary = {}
+    for path, report in results.items():
+        for backend, entry in report.items():
+            stats = summary.setdefault(backend, {'files': 0, 'ms': [], 'mismatches': [], 'errors': []})
+            stats['files'] += 1
+            if entry['error']:
+                stats['errors'].append((path, entry['error']))
+            else:
+                stats['ms'].append(entry['ms'])
+                if entry['parity'] is False:
+                    stats['mismatches'].append(path)
+
+    print(f"检查文件 {len(files)} 个")
+    print(f"{'后端':<12}{'文件数':>8}{'中位数ms':>12}{'合计ms':>12}{'不一致':>8}{'失败':>6}")
+    for backend, stats in summary.items():
+        median = statistics.median(stats['ms']) if stats['ms'] else float('nan')
+        print(f"{backend:<12}{stats['files']:>8}{median:>12.2f}{sum(stats['ms']):>12.1f}"
+              f"{len(stats['mismatches']):>8}{len(stats['errors']):>6}")
+    for backend, stats in summary.items():
+        for path in stats['mismatches']:
+            print(f"  ❌ {backend} 结果不一致：{path}")
+        for path, error in stats['errors']:
+            print(f"  ❌ {backend} 读取失败：{path}（{error}）")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+    return 1 if any(stats['mismatches'] or stats['errors'] for stats in summary.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""向量化提取引擎与逐格扫描参考实现的一致性检查
+
+用法：python tools/parity_check.py <文件或目录> [...]
+
+对每个可识别的Excel文件，用 read_template 读取一次窗口，再分别交给参考实现和
+docs_processing 的提取函数，比较两边的行、列顺序、取值和dtype（以及报错信息）。
+有任何不一致时以非零状态退出。
+"""
+import os
+import re
+import sys
+from io import BytesIO
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docs_processing import (classify_file, extract_combined_stock_rows, extract_mc_rows,  # noqa: E402
+                             extract_normal_stock_rows, extract_rel_rows)
+from docs_reader import read_template, template_key  # noqa: E402
+
+
+# ================== 参考实现 ==================
+def legacy_mc_rows(df, file_name):
+    """逐格扫描的MC Info提取（向量化引擎之前的实现）"""
+    mc_data = []
+    cd_code = df.iloc[10, 3] if df.shape[0] > 10 else ''
+
+    for row in range(20, min(len(df), 100)):
+        if all(pd.isna(df.iloc[row, i]) for i in range(4)):
+            continue
+
+        mc_data.append({
+            "CD Code": cd_code,
+            "Machine Type": df.iloc[row, 2] if df.shape[1] > 2 else '',
+            "S/N#": df.iloc[row, 3] if df.shape[1] > 3 else '',
+            "File_name": file_name
+        })
+
+    return pd.DataFrame(mc_data)
+
+
+def legacy_rel_rows(df, file_name):
+    """逐格扫描的Relocation四阶段抓取（向量化引擎之前的实现）"""
+    rel_data = []
+    from_cd = df.iloc[24, 3] if df.shape[0] > 24 else ''
+    to_cd = df.iloc[26, 3] if df.shape[0] > 26 else ''
+
+    # 模式1：原始抓取方式
+    for row in range(32, min(len(df), 100)):
+        if row >= len(df):
+            break
+        if df.shape[1] > 7 and pd.isna(df.iloc[row, 6]) and pd.isna(df.iloc[row, 7]):
+            break
+        rel_data.append({
+            "From_CD Code": from_cd,
+            "To_CD Code": to_cd,
+            "Machine Type": df.iloc[row, 1] if df.shape[1] > 1 else '',
+            "S/N#": df.iloc[row, 4] if df.shape[1] > 4 else '',
+            "File_name": file_name
+        })
+
+    # 模式2：备用抓取方案
+    if len(rel_data) == 0:
+        for row in range(33, min(len(df), 100)):
+            if row >= len(df):
+                break
+            if df.shape[1] > 8 and pd.isna(df.iloc[row, 7]) and pd.isna(df.iloc[row, 8]):
+                break
+            machine_type = df.iloc[row, 1] if df.shape[1] > 1 else ''
+            sn = df.iloc[row, 4] if df.shape[1] > 4 else ''
+            if pd.notna(machine_type) or pd.notna(sn):
+                rel_data.append({
+                    "From_CD Code": from_cd,
+                    "To_CD Code": to_cd,
+                    "Machine Type": machine_type,
+                    "S/N#": sn,
+                    "File_name": file_name
+                })
+
+    # 模式3：终极抓取方案
+    if len(rel_data) == 0:
+        # B列抓取（B33开始）
+        b_data = []
+        for row in range(33, min(len(df), 200)):
+            if row >= len(df):
+                break
+            if df.shape[1] > 8 and pd.isna(df.iloc[row, 7]) and pd.isna(df.iloc[row, 8]):
+                break
+            b_value = df.iloc[row, 1] if df.shape[1] > 1 else None
+            if pd.notna(b_value):
+                b_data.append({
+                    "From_CD Code": from_cd,
+                    "To_CD Code": to_cd,
+                    "Machine Type": b_value,
+                    "S/N#": "",
+                    "File_name": file_name
+                })
+
+        # E列抓取（E33开始）
+        e_data = []
+        for row in range(33, min(len(df), 200)):
+            if row >= len(df):
+                break
+            if df.shape[1] > 8 and pd.isna(df.iloc[row, 7]) and pd.isna(df.iloc[row, 8]):
+                break
+            e_value = df.iloc[row, 4] if df.shape[1] > 4 else None
+            if pd.notna(e_value):
+                e_data.append({
+                    "From_CD Code": from_cd,
+                    "To_CD Code": to_cd,
+                    "Machine Type": "",
+                    "S/N#": e_value,
+                    "File_name": file_name
+                })
+
+        rel_data.extend(b_data)
+        rel_data.extend(e_data)
+
+    # 模式4：旧版处理逻辑（从第32行开始逐行扫描）
+    if len(rel_data) == 0:
+        row = 32
+        while row < len(df):
+            if row >= len(df):
+                break
+            # 检查H列(7)和I列(8)是否同时为空
+            if df.shape[1] > 8 and pd.isna(df.iloc[row, 7]) and pd.isna(df.iloc[row, 8]):
+                break
+
+            # 提取数据
+            machine_type = df.iloc[row, 1] if df.shape[1] > 1 else ''
+            sn = df.iloc[row, 4] if df.shape[1] > 4 else ''
+
+            if pd.notna(machine_type) or pd.notna(sn):
+                rel_data.append({
+                    "From_CD Code": from_cd,
+                    "To_CD Code": to_cd,
+                    "Machine Type": machine_type,
+                    "S/N#": sn,
+                    "File_name": file_name
+                })
+            row += 1
+
+    return pd.DataFrame(rel_data)
+
+
+def legacy_normal_stock_rows(df, file_name):
+    """逐格扫描的普通Stock提取（向量化引擎之前的实现）"""
+    stock_data = []
+    c15 = str(df.iloc[14, 2]) if df.shape[0] > 14 and df.shape[1] > 2 else ''
+    matches = re.findall(r'[（(]([^）)]+)[）)]', c15)
+    cd_code = matches[-1].strip() if matches else ''
+
+    for row in range(20, min(len(df), 100)):
+        if df.shape[1] < 10:
+            break
+
+        if pd.isna(df.iloc[row, 8]) and pd.isna(df.iloc[row, 9]):
+            break
+
+        b_col = df.iloc[row, 1] if df.shape[1] > 1 else None
+        e_col = df.iloc[row, 4] if df.shape[1] > 4 else None
+
+        if pd.notna(b_col) or pd.notna(e_col):
+            stock_data.append({
+                "CD Code": cd_code,
+                "Machine Type": b_col,
+                "S/N#": e_col,
+                "File_name": file_name
+            })
+
+    return pd.DataFrame(stock_data)
+
+
+def legacy_combined_stock_rows(df, file_name):
+    """逐格扫描的二合一Stock提取（向量化引擎之前的实现）"""
+    combined_data = []
+    cd_end_user = df.iloc[14, 3] if df.shape[0] > 14 and df.shape[1] > 3 else ''
+    cd_distributor = df.iloc[15, 3] if df.shape[0] > 15 and df.shape[1] > 3 else ''
+
+    for row in range(21, min(len(df), 100)):
+        if df.shape[1] < 6:
+            break
+
+        if pd.isna(df.iloc[row, 9]):
+            break
+
+        c_col = df.iloc[row, 2] if df.shape[1] > 2 else None
+        f_col = df.iloc[row, 5] if df.shape[1] > 5 else None
+
+        if pd.notna(c_col) or pd.notna(f_col):
+            combined_data.append({
+                "CD Code_End User": cd_end_user,
+                "CD Code_Distributor": cd_distributor,
+                "Machine Type": c_col,
+                "S/N#": f_col,
+                "File_name": file_name
+            })
+
+    return pd.DataFrame(combined_data)
+
+
+# ================== 一致性检查 ==================
+EXTRACTORS = {
+    'MC': (legacy_mc_rows, extract_mc_rows),
+    'REL': (legacy_rel_rows, extract_rel_rows),
+    'STOCK': (legacy_normal_stock_rows, extract_normal_stock_rows),
+    'STOCK_COMBINED': (legacy_combined_stock_rows, extract_combined_stock_rows),
+}
+
+
+def _run(extractor, df, file_name):
+    try:
+        return extractor(df, file_name), None
+    except Exception as e:
+        return None, str(e)
+
+
+def check_frame(template, df, file_name):
+    """比较同一个窗口DataFrame上两种实现的结果，返回不一致说明（一致时返回None）"""
+    legacy, engine = EXTRACTORS[template]
+    expected, expected_error = _run(legacy, df, file_name)
+    actual, actual_error = _run(engine, df, file_name)
+    if expected_error != actual_error:
+        return f"报错不一致：{expected_error!r} != {actual_error!r}"
+    if expected is None:
+        return None
+    if list(expected.columns) != list(actual.columns):
+        return f"列不一致：{list(expected.columns)} != {list(actual.columns)}"
+    if not expected.equals(actual) or not (expected.dtypes == actual.dtypes).all():
+        return f"数据不一致：参考实现 {len(expected)} 行，向量化引擎 {len(actual)} 行"
+    return None
+
+
+def iter_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def main(paths):
+    checked = mismatched = 0
+    for path in iter_paths(paths):
+        file_name = os.path.basename(path)
+        file_type = classify_file(file_name)
+        if not file_type or not file_name.endswith(('.xls', '.xlsx', '.xlsm')):
+            continue
+        with open(path, 'rb') as fh:
+            file = BytesIO(fh.read())
+        file.name = file_name
+        try:
+            df = read_template(file, file_type)
+        except Exception as e:
+            print(f"⏩ 读取失败，跳过：{path} - {e}")
+            continue
+        checked += 1
+        problem = check_frame(template_key(file_type, file_name), df, file_name)
+        if problem:
+            mismatched += 1
+            print(f"❌ {path}：{problem}")
+    print(f"检查文件 {checked} 个，不一致 {mismatched} 个")
+    return 1 if mismatched else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:] or ['.']))